@@ -0,0 +1,92 @@
+"""Benchmark user-name enrichment for session listings.
+
+Compares the old per-session `find_one` enrichment against the batched
+`attach_user_names` path, reporting Mongo round trips and latency.
+
+Usage (needs a reachable MongoDB; uses a throwaway database):
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_enrichment.py --sessions 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from harness import CommandCounter, percentile
+
+import server
+
+
+async def enrich_one_by_one(sessions):
+    db = server.db
+    for session in sessions:
+        student = await db.users.find_one({"id": session["student_id"]}, {"_id": 0, "name": 1, "email": 1})
+        mentor = await db.users.find_one({"id": session["mentor_id"]}, {"_id": 0, "name": 1, "email": 1})
+        session["student_name"] = student["name"] if student else "Unknown"
+        session["mentor_name"] = mentor["name"] if mentor else "Unknown"
+    return sessions
+
+
+async def enrich_batched(sessions):
+    return await server.attach_user_names(sessions, {"student_id": "student_name", "mentor_id": "mentor_name"})
+
+
+async def seed(db, n_sessions, n_users):
+    await db.users.delete_many({})
+    await db.sessions.delete_many({})
+    users = [{"id": str(uuid.uuid4()), "name": f"user-{i}", "email": f"user{i}@example.com"} for i in range(n_users)]
+    await db.users.insert_many(users)
+    await db.users.create_index("id")
+    sessions = [
+        {
+            "id": str(uuid.uuid4()),
+            "student_id": users[i % n_users]["id"],
+            "mentor_id": users[(i * 7 + 1) % n_users]["id"],
+            "status": "pending",
+        }
+        for i in range(n_sessions)
+    ]
+    await db.sessions.insert_many(sessions)
+
+
+async def measure(name, fn, counter, runs):
+    latencies = []
+    trips = 0
+    for _ in range(runs):
+        sessions = await server.db.sessions.find({}, {"_id": 0}).to_list(None)
+        counter.count = 0
+        start = time.perf_counter()
+        await fn(sessions)
+        latencies.append((time.perf_counter() - start) * 1000)
+        trips = counter.count
+    print(
+        f"{name:<12} round_trips={trips:<6} "
+        f"p50={statistics.median(latencies):8.2f}ms p99={percentile(latencies, 99):8.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], event_listeners=[counter])
+    server.db = client[os.environ["DB_NAME"]]
+    try:
+        await seed(server.db, args.sessions, args.users)
+        await measure("one-by-one", enrich_one_by_one, counter, args.runs)
+        await measure("batched", enrich_batched, counter, args.runs)
+    finally:
+        await client.drop_database(os.environ["DB_NAME"])
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Benchmark CPU cost of serializing a 1000-item list response.
+
+Drives three throwaway routes through FastAPI over ASGI (no network, no
+database) so the numbers include FastAPI's own response handling:
+
+- validated: build UserResponse models and let response_model re-validate
+  and jsonable_encoder them (the old get_mentors path)
+- stdlib:    plain dicts through the default JSONResponse
+- fast:      plain dicts through server.json_response (orjson when installed)
+
+    python benchmarks/bench_serialization.py --items 1000 --runs 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from harness import asgi_request
+
+import server
+
+
+def make_docs(n):
+    return [
+        server.UserResponse(
+            id=str(uuid.uuid4()),
+            email=f"mentor{i}@example.com",
+            name=f"Mentor {i}",
+            role="mentor",
+            college="IIT Madras",
+            bio="Passionate about AI/ML research and helping students navigate their career paths.",
+            expertise=["AI", "ML", "Data Science"],
+            years_experience=i % 20,
+            photo=f"https://ui-avatars.com/api/?name=Mentor+{i}",
+            rating=4.5,
+        ).model_dump()
+        for i in range(n)
+    ]
+
+
+def build_app(docs):
+    app = FastAPI()
+
+    @app.get("/validated", response_model=List[server.UserResponse])
+    async def validated():
+        return [server.UserResponse(**doc) for doc in docs]
+
+    @app.get("/stdlib", response_class=JSONResponse)
+    async def stdlib():
+        return docs
+
+    @app.get("/fast")
+    async def fast():
+        return server.json_response(docs)
+
+    return app
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    app = build_app(make_docs(args.items))
+    print(f"encoder: {'orjson' if server.orjson is not None else 'stdlib json'}")
+    for path in ("/validated", "/stdlib", "/fast"):
+        size = len((await asgi_request(app, "GET", path))[1])
+        start = time.process_time()
+        for _ in range(args.runs):
+            await asgi_request(app, "GET", path)
+        cpu_ms = (time.process_time() - start) * 1000 / args.runs
+        print(f"{path[1:]:<10} {cpu_ms:8.2f} ms CPU per {args.items}-item response ({size} bytes)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
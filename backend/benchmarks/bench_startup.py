@@ -0,0 +1,107 @@
+"""Benchmark cold start: import, client creation, startup and first-request latency.
+
+Each run starts a fresh interpreter so nothing is cached between runs. The
+same measurements are taken with connection-pool warmup disabled and
+enabled, so the effect of MONGO_WARMUP_CONNECTIONS on the first burst of
+requests after /readyz turns green is visible.
+
+Usage (needs a reachable MongoDB; uses a throwaway database):
+
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_startup.py --runs 5 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Sets sys.path and env defaults; it also loads pymongo, so import_ms excludes that
+import harness
+
+
+async def measure_process(concurrency, steady_runs):
+    """Runs in the child: time one cold start of the app and print the results as JSON."""
+    started = time.perf_counter()
+    import server
+    import_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    server.create_mongo_client().close()
+    client_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    await server.start_application(server.app)
+    await server.app.state.startup_task
+    startup_ms = (time.perf_counter() - started) * 1000
+
+    user_ids = [user["id"] for user in await server.db.users.find({}, {"_id": 0, "id": 1}).to_list(concurrency * (steady_runs + 1))]
+
+    async def burst(ids):
+        async def one(user_id):
+            begin = time.perf_counter()
+            status, _ = await harness.asgi_request(server.app, "GET", f"/api/users/{user_id}")
+            assert status == 200, status
+            return (time.perf_counter() - begin) * 1000
+        return await asyncio.gather(*(one(user_id) for user_id in ids))
+
+    # Distinct ids per burst so the user cache never answers for Mongo
+    first = await burst(user_ids[:concurrency])
+    steady = []
+    for i in range(1, steady_runs + 1):
+        steady.extend(await burst(user_ids[i * concurrency:(i + 1) * concurrency]))
+
+    await server.stop_application(server.app)
+    print(json.dumps({
+        "import_ms": import_ms,
+        "client_ms": client_ms,
+        "startup_ms": startup_ms,
+        "first_p50_ms": statistics.median(first),
+        "first_max_ms": max(first),
+        "steady_p50_ms": statistics.median(steady),
+        "steady_p99_ms": harness.percentile(steady, 99),
+    }))
+
+
+def run_child(args, warmup):
+    env = dict(os.environ, MONGO_WARMUP_CONNECTIONS=str(warmup))
+    command = [sys.executable, __file__, "--child", "--concurrency", str(args.concurrency), "--steady-runs", str(args.steady_runs)]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+async def compare(args):
+    import server
+    await server.client.drop_database(os.environ["DB_NAME"])
+    try:
+        await server.ensure_indexes()
+        await server.seed_fixture_data(students=args.concurrency * (args.steady_runs + 1), mentors=10, sessions=0)
+        for warmup in (0, args.concurrency):
+            results = [await asyncio.to_thread(run_child, args, warmup) for _ in range(args.runs)]
+            summary = {key: statistics.median(result[key] for result in results) for key in results[0]}
+            print(f"warmup={warmup:<4} " + " ".join(f"{key}={value:8.2f}" for key, value in summary.items()))
+    finally:
+        await server.client.drop_database(os.environ["DB_NAME"])
+        server.client.close()
+        server.password_hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in each burst")
+    parser.add_argument("--steady-runs", type=int, default=10, help="bursts after the first one")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(measure_process(args.concurrency, args.steady_runs))
+        return
+
+    asyncio.run(compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Shared helpers for the benchmark scripts.
+
+Importing this module puts backend/ on sys.path and provides defaults for
+the environment server.py reads at import time.
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from pymongo import monitoring
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "mentor_bridge_bench")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands (round trips) issued through a client."""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def asgi_request(app, method, path, headers=None, body=None):
+    """Call an ASGI app in-process and return (status, body bytes)."""
+    path, _, query = path.partition("?")
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    payload = b""
+    if body is not None:
+        payload = json.dumps(body).encode()
+        raw_headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http", "http_version": "1.1", "method": method, "path": path, "raw_path": path.encode(),
+        "root_path": "", "scheme": "http", "query_string": query.encode(), "headers": raw_headers,
+        "client": ("bench", 0), "server": ("bench", 80),
+    }
+    response = {"status": 0, "body": []}
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Block like a connected client until the response is complete
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], b"".join(response["body"])
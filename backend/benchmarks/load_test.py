@@ -0,0 +1,279 @@
+"""Load test the API in-process against MongoDB or an in-memory stand-in.
+
+Seeds a fresh database with generated fixtures, drives a weighted mix of
+realistic requests (login bursts, directory searches, session listings,
+messaging, dashboards) through the ASGI app with N concurrent virtual
+users, and writes per-route throughput, p50/p95/p99 latency and Mongo
+round trips per request to a JSON file.
+
+    # Local mongod: full fidelity, round trips counted with a CommandListener
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/load_test.py \\
+        --students 2000 --mentors 200 --sessions 20000 --duration 30 --out results.json
+
+    # In-memory stand-in (pip install -r requirements-dev.txt). No round-trip counts,
+    # and operators mongomock lacks ($round, $unionWith, ...) show up as errors.
+    python benchmarks/load_test.py --backend mongomock --duration 10
+
+    # Compare with an earlier run; exits 1 if a route got slower or chattier
+    python benchmarks/load_test.py --compare baseline.json --out current.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from harness import CommandCounter, asgi_request, percentile
+
+import server
+
+DEFAULT_MIX = {
+    "login": 1,
+    "directory": 2,
+    "search": 4,
+    "sessions": 3,
+    "mentor_sessions": 1,
+    "send_message": 2,
+    "conversations": 2,
+    "thread": 2,
+    "stats": 1,
+}
+SEARCH_TERMS = ["ai", "data", "cloud", "secur", "pythn", "web", "databse", "project", "mentor 1"]
+
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    if text:
+        for part in text.split(","):
+            name, _, weight = part.partition("=")
+            if name not in DEFAULT_MIX:
+                raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+            mix[name] = float(weight)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Scenarios:
+    """Builds requests for each named scenario from the seeded users."""
+
+    def __init__(self, students, mentors):
+        self.students = students
+        self.mentors = mentors
+        self.tokens = {user["id"]: server.create_access_token({"sub": user["id"]}) for user in students + mentors}
+
+    def auth(self, user):
+        return {"Authorization": f"Bearer {self.tokens[user['id']]}"}
+
+    def build(self, name, rng):
+        student = rng.choice(self.students)
+        mentor = rng.choice(self.mentors)
+        if name == "login":
+            return "POST", "/api/auth/login", None, {"email": student["email"], "password": "loadtest"}
+        if name == "directory":
+            return "GET", "/api/mentors", self.auth(student), None
+        if name == "search":
+            return "GET", f"/api/mentors?search={quote(rng.choice(SEARCH_TERMS))}", self.auth(student), None
+        if name == "sessions":
+            return "GET", "/api/sessions", self.auth(student), None
+        if name == "mentor_sessions":
+            return "GET", "/api/sessions", self.auth(mentor), None
+        if name == "send_message":
+            body = {"to_user_id": mentor["id"], "content": f"Hello {mentor['id'][:8]}"}
+            return "POST", "/api/messages", self.auth(student), body
+        if name == "conversations":
+            return "GET", "/api/messages/conversations", self.auth(mentor), None
+        if name == "thread":
+            return "GET", f"/api/messages/conversations/{student['id']}", self.auth(mentor), None
+        if name == "stats":
+            return "GET", "/api/analytics/stats", self.auth(rng.choice([student, mentor])), None
+        raise ValueError(name)
+
+
+def connect(backend):
+    if backend == "mongomock":
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--backend mongomock needs mongomock-motor (pip install -r requirements-dev.txt)")
+        return AsyncMongoMockClient(), None
+    counter = CommandCounter()
+    return AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True, event_listeners=[counter]), counter
+
+
+async def setup(args):
+    client, counter = connect(args.backend)
+    server.client = client
+    server.db = client[args.db]
+    await client.drop_database(args.db)
+    await server.ensure_indexes()
+    await server.seed_fixture_data(args.students, args.mentors, args.sessions, seed=args.seed)
+    await server.refresh_mentor_index()
+    await server.message_hub.start()
+
+    students = await server.db.users.find({"role": "student"}, {"_id": 0, "id": 1, "email": 1}).limit(500).to_list(None)
+    mentors = await server.db.users.find({"role": "mentor"}, {"_id": 0, "id": 1, "email": 1}).limit(500).to_list(None)
+    return client, counter, Scenarios(students, mentors)
+
+
+async def run_load(scenarios, mix, args):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.perf_counter() + args.duration
+    remaining = [args.requests] if args.requests else None
+
+    async def virtual_user(index):
+        rng = random.Random(args.seed + index)
+        while time.perf_counter() < deadline:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            method, path, headers, body = scenarios.build(name, rng)
+            start = time.perf_counter()
+            status, _ = await asgi_request(server.app, method, path, headers, body)
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[virtual_user(i) for i in range(args.concurrency)])
+    return latencies, errors, time.perf_counter() - started
+
+
+async def calibrate_round_trips(scenarios, mix, counter, runs, seed):
+    """Commands per request for each scenario, measured one request at a time."""
+    rng = random.Random(seed)
+    trips = {}
+    for name in mix:
+        counter.count = 0
+        for _ in range(runs):
+            method, path, headers, body = scenarios.build(name, rng)
+            await asgi_request(server.app, method, path, headers, body)
+        trips[name] = round(counter.count / runs, 2)
+    return trips
+
+
+def summarize(latencies, errors, elapsed, trips, args, mix):
+    routes = {}
+    for name, samples in latencies.items():
+        routes[name] = {
+            "requests": len(samples),
+            "errors": errors[name],
+            "throughput_rps": round(len(samples) / elapsed, 1),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "round_trips": trips.get(name),
+        }
+    total = sum(len(samples) for samples in latencies.values())
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": commit or None,
+            "backend": args.backend,
+            "students": args.students,
+            "mentors": args.mentors,
+            "sessions": args.sessions,
+            "concurrency": args.concurrency,
+            "elapsed_s": round(elapsed, 2),
+            "seed": args.seed,
+            "mix": mix,
+        },
+        "total": {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "throughput_rps": round(total / elapsed, 1),
+        },
+        "routes": routes,
+    }
+
+
+def print_report(result):
+    print(f"{'scenario':<16}{'reqs':>7}{'errs':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'trips':>7}")
+    for name, row in result["routes"].items():
+        trips = "-" if row["round_trips"] is None else f"{row['round_trips']:g}"
+        print(
+            f"{name:<16}{row['requests']:>7}{row['errors']:>6}{row['throughput_rps']:>9}"
+            f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{trips:>7}"
+        )
+    total = result["total"]
+    print(f"total: {total['requests']} requests, {total['errors']} errors, {total['throughput_rps']} req/s")
+
+
+def compare(baseline, current, tolerance):
+    """Print per-route deltas and return the scenarios that regressed."""
+    regressions = []
+    for name, row in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if not before or not row["requests"]:
+            continue
+        slower = row["p95_ms"] > before["p95_ms"] * (1 + tolerance) and row["p95_ms"] - before["p95_ms"] > 1
+        chattier = (row["round_trips"] is not None and before.get("round_trips") is not None
+                    and row["round_trips"] > before["round_trips"])
+        delta = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        flag = "REGRESSION" if slower or chattier else ""
+        print(f"{name:<16} p95 {before['p95_ms']:>8} -> {row['p95_ms']:>8} ms ({delta:+.0f}%)  "
+              f"trips {before.get('round_trips')} -> {row['round_trips']}  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["mongo", "mongomock"], default="mongo")
+    parser.add_argument("--db", default="mentor_bridge_load")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--mentors", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run the mix")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests")
+    parser.add_argument("--mix", help="override weights, e.g. login=0,search=10")
+    parser.add_argument("--calibration-runs", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="load_test_results.json")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown before failing")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    client, counter, scenarios = await setup(args)
+    try:
+        latencies, errors, elapsed = await run_load(scenarios, mix, args)
+        trips = {}
+        if counter is not None:
+            trips = await calibrate_round_trips(scenarios, mix, counter, args.calibration_runs, args.seed)
+    finally:
+        await server.message_hub.close()
+        await client.drop_database(args.db)
+        client.close()
+        server.password_hasher.shutdown()
+
+    result = summarize(latencies, errors, elapsed, trips, args, mix)
+    print_report(result)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, result, args.tolerance):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
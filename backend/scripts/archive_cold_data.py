@@ -0,0 +1,57 @@
+"""Move old messages and finished sessions into their archive collections.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge \
+        python scripts/archive_cold_data.py [COLLECTION ...] [--batch-size 1000] [--rebuild-counters]
+
+Read messages older than MESSAGE_HOT_DAYS and completed or cancelled
+sessions older than SESSION_HOT_DAYS move to messages_archive and
+sessions_archive; the API reads those only when a page reaches past the
+hot window. Safe to run against a live deployment, on a schedule, and to
+interrupt: the next run continues where this one stopped. Each
+collection waits ARCHIVE_HORIZON_TTL_SECONDS after publishing its new
+horizon so API processes stop trusting their cached copy first. After an
+interrupted run, --rebuild-counters recomputes the archived-session
+tallies used by the analytics endpoints.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+def report(collection, moved):
+    print(f"\r{collection}: {moved} archived", end="", flush=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("collections", nargs="*", help=f"default: {' '.join(server.ARCHIVE_POLICIES)}")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rebuild-counters", action="store_true", help="recompute archived-session tallies afterwards")
+    args = parser.parse_args()
+    unknown = set(args.collections) - set(server.ARCHIVE_POLICIES)
+    if unknown:
+        parser.error(f"unknown collections: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    try:
+        await server.ensure_indexes()
+        for collection in args.collections or server.ARCHIVE_POLICIES:
+            moved = await server.archive_collection(collection, args.batch_size, report)
+            print(f"\r{collection}: {moved} archived")
+        if args.rebuild_counters:
+            await server.rebuild_archived_session_counts()
+            print("Archived session counters rebuilt")
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"Archived in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+"""Fail if any registered route query shape runs as a collection scan.
+
+Creates the registered indexes, then explains every entry in
+server.QUERY_SHAPES. Exits non-zero when a COLLSCAN is found, so it can
+gate CI against a MongoDB service container:
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge python scripts/audit_query_plans.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+async def main() -> int:
+    try:
+        await server.ensure_indexes()
+        collscans = await server.audit_query_plans()
+    finally:
+        server.client.close()
+    for name in collscans:
+        print(f"COLLSCAN: {name}")
+    print(f"{len(server.QUERY_SHAPES) - len(collscans)}/{len(server.QUERY_SHAPES)} query shapes use an index")
+    return 1 if collscans else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,47 @@
+"""Give messages sent before conversation threads existed a thread.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge \
+        python scripts/backfill_conversations.py [--batch-size 1000]
+
+Stamps every hot and archived message lacking conversation_id, rebuilds
+the conversation rows of the threads it touches, then recomputes unread
+totals. Safe to run against a live deployment, including one where older
+workers are still writing messages without a conversation_id, and to
+interrupt: the next run picks up whatever is still unstamped.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+def report(collection, stamped):
+    print(f"\r{collection}: {stamped} stamped", end="", flush=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        await server.ensure_indexes()
+        stamped = await server.backfill_conversations(args.batch_size, report)
+        print(f"\rmessages: {stamped} stamped")
+        if stamped:
+            await server.rebuild_unread_counters()
+            print("Unread counters rebuilt")
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"Backfilled in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""Find users that share an email or id, which block the unique user indexes.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge \
+        python scripts/dedupe_users.py [--apply]
+
+Without --apply this only reports the duplicates. With --apply the oldest
+document for each key is kept and the others are moved to the
+`users_duplicates` collection (not deleted), after which the next server
+start builds the unique indexes.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+from pymongo import ReplaceOne
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+async def find_duplicates(field):
+    pipeline = [
+        {"$group": {"_id": f"${field}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return await server.db.users.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="move all but the oldest duplicate aside")
+    args = parser.parse_args()
+
+    moved = 0
+    try:
+        for field in ("id", "email"):
+            for group in await find_duplicates(field):
+                # ObjectIds grow with insertion time, so the smallest is the original
+                keep, *extra = sorted(group["ids"])
+                print(f"{field}={group['_id']!r}: {group['count']} documents, keeping {keep}")
+                if not args.apply:
+                    continue
+                docs = await server.db.users.find({"_id": {"$in": extra}}).to_list(None)
+                if docs:
+                    # Upserts, so a rerun after an interruption does not trip over copies already made
+                    await server.db.users_duplicates.bulk_write(
+                        [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs]
+                    )
+                    await server.db.users.delete_many({"_id": {"$in": extra}})
+                    moved += len(docs)
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    if args.apply:
+        print(f"Moved {moved} duplicate users to users_duplicates")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
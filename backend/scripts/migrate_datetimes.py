@@ -0,0 +1,49 @@
+"""Convert timestamps stored as ISO strings to native BSON dates.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge \
+        python scripts/migrate_datetimes.py [COLLECTION ...] [--batch-size 1000] [--restart]
+
+Safe to run against a live deployment and to interrupt: progress is
+checkpointed per collection in the `migrations` collection and the next
+run resumes from there. Collections already finished are skipped unless
+--restart is given. Sessions booked before slot starts existed also get
+`start` derived from their date and time when those parse.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+def report(collection, converted):
+    print(f"\r{collection}: {converted} converted", end="", flush=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("collections", nargs="*", help=f"default: {' '.join(server.DATETIME_FIELDS)}")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoints")
+    args = parser.parse_args()
+    unknown = set(args.collections) - set(server.DATETIME_FIELDS)
+    if unknown:
+        parser.error(f"unknown collections: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    try:
+        for collection in args.collections or server.DATETIME_FIELDS:
+            converted = await server.migrate_datetimes(collection, args.batch_size, args.restart, report)
+            print(f"\r{collection}: {converted} converted")
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"Migrated in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
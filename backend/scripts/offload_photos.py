@@ -0,0 +1,41 @@
+"""Move inline data-URI profile photos into the photo store.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge \
+        PHOTO_STORE_BACKEND=disk python scripts/offload_photos.py [--batch-size 100]
+
+Uses the same PHOTO_STORE_* settings as the server, so run it with the
+deployment's environment. Safe to interrupt and re-run: users whose photo
+was already moved no longer match. Restart the API afterwards, or wait for
+its user cache to expire, so no stale inline copies are served.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+def report(moved, skipped):
+    print(f"\r{moved} moved, {skipped} skipped", end="", flush=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        moved, skipped = await server.offload_inline_photos(args.batch_size, report)
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"\r{moved} moved, {skipped} skipped in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
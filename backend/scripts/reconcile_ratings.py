@@ -0,0 +1,32 @@
+"""Rebuild mentor rating aggregates (sum, count, histogram) from feedback.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge python scripts/reconcile_ratings.py [USER_ID ...]
+
+Users without aggregates are also seeded on their next rating or summary
+read, so this is only needed to repair drift or to backfill in one go.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("user_ids", nargs="*", help="default: every user with feedback")
+    args = parser.parse_args()
+
+    try:
+        updated = await server.reconcile_ratings(args.user_ids or None)
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"Reconciled ratings for {updated} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
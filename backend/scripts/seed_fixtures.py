@@ -0,0 +1,41 @@
+"""Load a large generated data set for load testing.
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=mentor_bridge_load \
+        python scripts/seed_fixtures.py --students 100000 --mentors 10000 --sessions 1000000
+
+All generated accounts use the password "loadtest".
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--mentors", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        await server.ensure_indexes()
+        await server.seed_fixture_data(args.students, args.mentors, args.sessions, args.batch_size, args.seed)
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        server.client.close()
+        server.password_hasher.shutdown()
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
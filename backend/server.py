@@ -1,41 +1,332 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from fastapi.responses import PlainTextResponse, Response
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, WriteConcernError, WriteError
+from gridfs.errors import NoFile
 import os
+import asyncio
+import random
+import re
+import bisect
+import heapq
+import base64
+import csv
+import hashlib
+import io
+import json
 import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, suppress
+from contextvars import Context, ContextVar
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
 import jwt
+import numpy as np
 from passlib.context import CryptContext
 
+try:
+    import orjson
+except ImportError:  # optional: responses fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional: photos are stored without thumbnails
+    Image = None
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Observability
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0))  # 0 disables the slow-request log
+
+
+# --- Metrics ---
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms rendered in Prometheus text format.
+
+    Mongo command events arrive on driver threads, so every update takes
+    the lock. Collectors are callables polled at scrape time for values
+    that already live elsewhere (cache and pool stats).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}  # name -> (type, help, buckets)
+        self._values = {}  # name -> {label tuple: value or [bucket counts, sum, count]}
+        self._collectors = []
+
+    def define(self, name: str, kind: str, help_text: str, buckets=None):
+        self._meta[name] = (kind, help_text, buckets)
+        self._values[name] = {}
+
+    def inc(self, name: str, labels: dict, amount: float = 1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            values = self._values[name]
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, name: str, labels: dict, value: float):
+        key = tuple(sorted(labels.items()))
+        buckets = self._meta[name][2]
+        with self._lock:
+            series = self._values[name].setdefault(key, [[0] * len(buckets), 0.0, 0])
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def register_collector(self, collector):
+        """`collector()` returns [(name, kind, help, labels, value), ...]."""
+        self._collectors.append(collector)
+
+    @staticmethod
+    def _labels(key, extra=()) -> str:
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            snapshot = {
+                name: {key: (value if not isinstance(value, list) else (list(value[0]), value[1], value[2]))
+                       for key, value in values.items()}
+                for name, values in self._values.items()
+            }
+        for name, (kind, help_text, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in snapshot[name].items():
+                if kind == "histogram":
+                    counts, total, count = value
+                    for bound, bucket_count in zip(buckets, counts):
+                        lines.append(f"{name}_bucket{self._labels(key, [('le', bound)])} {bucket_count}")
+                    lines.append(f"{name}_bucket{self._labels(key, [('le', '+Inf')])} {count}")
+                    lines.append(f"{name}_sum{self._labels(key)} {total}")
+                    lines.append(f"{name}_count{self._labels(key)} {count}")
+                else:
+                    lines.append(f"{name}{self._labels(key)} {value}")
+        seen = set()
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{self._labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+metrics.define("http_requests_total", "counter", "HTTP requests by method, route and status.")
+metrics.define("http_request_duration_seconds", "histogram", "HTTP request latency by route.", LATENCY_BUCKETS)
+metrics.define("http_requests_in_flight", "gauge", "HTTP requests currently being served.")
+metrics.define("http_request_mongo_commands", "histogram", "Mongo commands issued per HTTP request.", COUNT_BUCKETS)
+metrics.define("mongo_commands_total", "counter", "Mongo commands by collection, command and outcome.")
+metrics.define("mongo_command_duration_seconds", "histogram", "Mongo command latency.", LATENCY_BUCKETS)
+metrics.define("singleflight_requests_total", "counter", "Coalescable reads by route and whether they led or joined a load.")
+metrics.define("write_batch_size", "histogram", "Documents per group-committed insert by collection and flush trigger.", BATCH_SIZE_BUCKETS)
+metrics.define("write_batch_flush_seconds", "histogram", "Latency of group-committed inserts by collection.", LATENCY_BUCKETS)
+metrics.define("write_batch_documents_total", "counter", "Group-committed documents by collection and outcome.")
+
+class RequestStats:
+    """Mongo commands issued while serving one HTTP request."""
+
+    def __init__(self):
+        self.commands = []  # (command, collection, seconds, ok)
+
+    def record(self, command: str, collection: str, seconds: float, ok: bool):
+        self.commands.append((command, collection, seconds, ok))
+
+# Motor copies the caller's context onto its executor threads, so driver
+# events can see the request that issued them.
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every Mongo command and attributes it to the current request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}  # (connection, request id) -> collection
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, ok: bool):
+        with self._lock:
+            collection = self._started.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1e6
+        labels = {"collection": collection, "command": event.command_name}
+        metrics.inc("mongo_commands_total", {**labels, "outcome": "ok" if ok else "failed"})
+        metrics.observe("mongo_command_duration_seconds", labels, seconds)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.record(event.command_name, collection, seconds, ok)
+
+    def succeeded(self, event):
+        self._finish(event, True)
+
+    def failed(self, event):
+        self._finish(event, False)
+
+mongo_command_metrics = MongoCommandMetrics()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 10))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 0))  # 0 keeps idle connections open
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 0))  # 0 waits for a free connection indefinitely
+# Connections opened before the app reports ready; 0 skips warmup
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get('MONGO_WARMUP_CONNECTIONS', MONGO_MIN_POOL_SIZE))
+READINESS_TIMEOUT_SECONDS = float(os.environ.get('READINESS_TIMEOUT_SECONDS', 1))
+# Pause between startup attempts while Mongo is unreachable
+STARTUP_RETRY_SECONDS = float(os.environ.get('STARTUP_RETRY_SECONDS', 5))
+
+def create_mongo_client() -> AsyncIOMotorClient:
+    # connect=False defers the topology threads to first use, so importing this
+    # module (scripts, benchmarks) costs no network I/O
+    return AsyncIOMotorClient(
+        mongo_url,
+        tz_aware=True,
+        connect=False,
+        event_listeners=[mongo_command_metrics],
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS or None,
+        connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+        serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+    )
+
+client = create_mongo_client()
 db = client[os.environ['DB_NAME']]
 
 # Security
 SECRET_KEY = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 72
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# EventSource can only authenticate through the URL, which access logs record,
+# so streams are opened with a short-lived ticket that grants nothing else
+STREAM_TICKET_SCOPE = "message_stream"
+STREAM_TICKET_TTL_SECONDS = int(os.environ.get('STREAM_TICKET_TTL_SECONDS', 60))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', os.cpu_count() or 2))
+PASSWORD_QUEUE_SIZE = int(os.environ.get('PASSWORD_QUEUE_SIZE', 64))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+USER_LOOKUP_MAX_IDS = int(os.environ.get('USER_LOOKUP_MAX_IDS', 500))
+
+# Caching
+USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED', 'true').lower() in ('1', 'true')
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 30))
+
+# Request coalescing: routes whose concurrent identical reads share one query
+COALESCED_ROUTES = {
+    name.strip()
+    for name in os.environ.get('COALESCED_ROUTES', 'get_user_feedback,get_analytics,get_chart_data').split(',')
+    if name.strip()
+}
+
+# Write batching: group-commit message and feedback inserts from concurrent requests
+WRITE_BATCHING_ENABLED = os.environ.get('WRITE_BATCHING_ENABLED', 'false').lower() in ('1', 'true')
+WRITE_BATCH_MAX_SIZE = int(os.environ.get('WRITE_BATCH_MAX_SIZE', 200))
+WRITE_BATCH_MAX_DELAY_MS = float(os.environ.get('WRITE_BATCH_MAX_DELAY_MS', 5))
+
+# Archival: older rows move to <collection>_archive (see scripts/archive_cold_data.py)
+MESSAGE_HOT_DAYS = int(os.environ.get('MESSAGE_HOT_DAYS', 180))
+SESSION_HOT_DAYS = int(os.environ.get('SESSION_HOT_DAYS', 90))
+# How long an API process trusts its copy of the archive horizon; the archiver waits this long before moving rows
+ARCHIVE_HORIZON_TTL_SECONDS = float(os.environ.get('ARCHIVE_HORIZON_TTL_SECONDS', 30))
+
+# Analytics
+MATERIALIZED_COUNTERS = os.environ.get('MATERIALIZED_COUNTERS', 'true').lower() in ('1', 'true')
+
+# Real-time messaging
+MESSAGE_HUB_BACKEND = os.environ.get('MESSAGE_HUB_BACKEND', 'memory')  # memory or mongo
+MESSAGE_STREAM_QUEUE_SIZE = int(os.environ.get('MESSAGE_STREAM_QUEUE_SIZE', 100))
+MESSAGE_STREAM_KEEPALIVE_SECONDS = float(os.environ.get('MESSAGE_STREAM_KEEPALIVE_SECONDS', 15))
+
+# Mentor search
+MENTOR_INDEX_REFRESH_SECONDS = float(os.environ.get('MENTOR_INDEX_REFRESH_SECONDS', 300))
+# GET /mentors without a limit returns the whole directory up to this many mentors
+MENTOR_DIRECTORY_MAX_ITEMS = int(os.environ.get('MENTOR_DIRECTORY_MAX_ITEMS', 1000))
+
+# Scheduling
+SESSION_SLOT_MINUTES = int(os.environ.get('SESSION_SLOT_MINUTES', 60))
+MAX_SLOT_RANGE_DAYS = int(os.environ.get('MAX_SLOT_RANGE_DAYS', 62))
+
+# HTTP caching
+MENTOR_DIRECTORY_MAX_AGE = int(os.environ.get('MENTOR_DIRECTORY_MAX_AGE', 30))
+DIRECTORY_RESPONSE_CACHE_SIZE = int(os.environ.get('DIRECTORY_RESPONSE_CACHE_SIZE', 32))
+
+# Photos
+PHOTO_STORE_BACKEND = os.environ.get('PHOTO_STORE_BACKEND', 'disk')  # disk or gridfs
+PHOTO_STORE_PATH = Path(os.environ.get('PHOTO_STORE_PATH', ROOT_DIR / 'photos'))
+PHOTO_MAX_BYTES = int(os.environ.get('PHOTO_MAX_BYTES', 5 * 1024 * 1024))
+# Checked from the image header before decoding: a few MB of compressed pixels can expand to GBs
+PHOTO_MAX_PIXELS = int(os.environ.get('PHOTO_MAX_PIXELS', 25_000_000))
+PHOTO_THUMBNAIL_SIZES = tuple(int(size) for size in os.environ.get('PHOTO_THUMBNAIL_SIZES', '64,256').split(','))
+
+# Serialization
+DefaultResponse = ORJSONResponse if orjson is not None else JSONResponse
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', 500))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_application(app)
+    try:
+        yield
+    finally:
+        await stop_application(app)
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=DefaultResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 
 # --- Models ---
+def utc_now() -> datetime:
+    """Current UTC time at BSON date precision, so stored and in-memory copies compare equal."""
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -51,7 +342,7 @@ class User(BaseModel):
     years_experience: Optional[int] = None
     photo: Optional[str] = None
     rating: Optional[float] = 0.0
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    created_at: datetime = Field(default_factory=utc_now)
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -87,92 +378,1987 @@ class Session(BaseModel):
     time: str
     status: str  # pending, confirmed, completed, cancelled
     notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    start: Optional[datetime] = None  # UTC start of the booked slot
+    created_at: datetime = Field(default_factory=utc_now)
+
+class SessionCreate(BaseModel):
+    mentor_id: str
+    date: str
+    time: str
+    notes: Optional[str] = None
+
+class Message(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    from_user_id: str
+    to_user_id: str
+    content: str
+    read: bool = False
+    created_at: datetime = Field(default_factory=utc_now)
+
+class MessageCreate(BaseModel):
+    to_user_id: str
+    content: str
+
+class MarkRead(BaseModel):
+    user_id: str  # the other participant
+    up_to: Optional[str] = None  # read_cursor of the newest message seen; all when omitted
+
+class UserLookup(BaseModel):
+    ids: List[str]
+    fields: Optional[List[str]] = None  # UserResponse fields; all when omitted
+
+class Feedback(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    session_id: str
+    from_user_id: str
+    to_user_id: str
+    rating: int
+    comment: Optional[str] = None
+    created_at: datetime = Field(default_factory=utc_now)
+
+class FeedbackCreate(BaseModel):
+    session_id: str
+    to_user_id: str
+    rating: int = Field(ge=1, le=5)
+    comment: Optional[str] = None
+
+class ProfileUpdate(BaseModel):
+    name: Optional[str] = None
+    bio: Optional[str] = None
+    college: Optional[str] = None
+    skills: Optional[List[str]] = None
+    expertise: Optional[List[str]] = None
+    years_experience: Optional[int] = None
+    photo: Optional[str] = Field(None, max_length=2048)
+
+class AvailabilityWindow(BaseModel):
+    weekday: int = Field(ge=0, le=6)  # Monday is 0
+    start: str = Field(pattern=r"^([01][0-9]|2[0-3]):[0-5][0-9]$")  # HH:MM, UTC
+    end: str = Field(pattern=r"^(([01][0-9]|2[0-3]):[0-5][0-9]|24:00)$")
+
+class AvailabilityUpdate(BaseModel):
+    windows: List[AvailabilityWindow]
+
+
+# --- User cache ---
+class UserCache:
+    """Bounded TTL/LRU cache of user documents keyed by user id.
+
+    Concurrent misses for the same id share a single load. invalidate()
+    drops the entry and detaches any in-flight load, so a read that raced
+    a write never repopulates the cache with the old document.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()  # user_id -> (expires_at, doc)
+        self._loading = {}  # user_id -> Task
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, user_id: str, loader):
+        if not self.enabled:
+            return await loader(user_id)
+        
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return dict(entry[1])
+            del self._entries[user_id]
+        
+        self.misses += 1
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(user_id, loader))
+            self._loading[user_id] = task
+        doc = await asyncio.shield(task)
+        return dict(doc) if doc is not None else None
+
+    async def _load(self, user_id: str, loader):
+        task = asyncio.current_task()
+        try:
+            doc = await loader(user_id)
+            if doc is not None and self._loading.get(user_id) is task:
+                self._entries[user_id] = (time.monotonic() + self.ttl_seconds, doc)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return doc
+        finally:
+            if self._loading.get(user_id) is task:
+                del self._loading[user_id]
+
+    def invalidate(self, user_id: str):
+        self._entries.pop(user_id, None)
+        self._loading.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._loading.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS, enabled=USER_CACHE_ENABLED)
+
+
+# --- Request coalescing ---
+class SingleFlight:
+    """Lets concurrent identical reads share one in-flight load.
+
+    The first caller for a (route, key) pair runs the load; callers that
+    arrive before it finishes await the same task instead of querying
+    again. Nothing is kept after the load completes, so a result is never
+    older than the request that started it. Shared results must be treated
+    as read-only.
+    """
+
+    def __init__(self, routes: set):
+        self.routes = routes
+        self._in_flight = {}  # (route, key) -> Task
+
+    async def do(self, route: str, key, loader):
+        if route not in self.routes:
+            return await loader()
+        
+        flight_key = (route, key)
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._in_flight[flight_key] = task
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+            outcome = "leader"
+        else:
+            outcome = "coalesced"
+        metrics.inc("singleflight_requests_total", {"route": route, "outcome": outcome})
+        # Shielded so one caller disconnecting does not cancel the load for the rest
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key, task):
+        if self._in_flight.get(flight_key) is task:
+            del self._in_flight[flight_key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._in_flight)}
+
+singleflight = SingleFlight(COALESCED_ROUTES)
+
+
+# --- Write batching ---
+class WriteBatcher:
+    """Group-commits inserts from concurrent requests into one insert_many.
+
+    Documents queue until `max_size` are waiting or `max_delay` seconds have
+    passed since the first, then go out as one unordered insert_many. Each
+    caller's `insert` returns only once the batch holding its document is
+    acknowledged under the collection's write concern, so callers keep the
+    durability of insert_one. Per-document failures (a duplicate key) go
+    to the caller that owns the document; a failure of the whole batch
+    goes to every caller in it. When disabled or closed, `insert` is a
+    plain insert_one.
+    """
+
+    def __init__(self, collection: str, max_size: int, max_delay: float, enabled: bool = True):
+        self.collection = collection
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.enabled = enabled
+        self._pending = []  # (doc, future)
+        self._timer = None
+        self._flushes = set()
+        self._closed = False
+
+    async def insert(self, doc: dict):
+        if not self.enabled or self._closed:
+            await db[self.collection].insert_one(doc)
+            return
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((doc, future))
+        if len(self._pending) >= self.max_size:
+            self._flush("size")
+        elif self._timer is None:
+            # Fresh context: the batch belongs to no single request's stats
+            self._timer = loop.call_later(self.max_delay, self._flush, "deadline", context=Context())
+        # Shielded so a disconnecting caller can't cancel the write under the others
+        await asyncio.shield(future)
+
+    def _flush(self, trigger: str):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._write(batch, trigger), context=Context())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, batch: list, trigger: str):
+        labels = {"collection": self.collection}
+        failed, batch_error = {}, None
+        started = time.perf_counter()
+        try:
+            await db[self.collection].insert_many([doc for doc, _ in batch], ordered=False)
+        except BulkWriteError as exc:
+            for error in exc.details.get("writeErrors", []):
+                error_type = DuplicateKeyError if error.get("code") == 11000 else WriteError
+                failed[error["index"]] = error_type(error.get("errmsg"), error.get("code"), error)
+            if exc.details.get("writeConcernErrors"):
+                concern = exc.details["writeConcernErrors"][0]
+                batch_error = WriteConcernError(concern.get("errmsg"), concern.get("code"), concern)
+        except Exception as exc:
+            batch_error = exc
+        metrics.observe("write_batch_flush_seconds", labels, time.perf_counter() - started)
+        metrics.observe("write_batch_size", {**labels, "trigger": trigger}, len(batch))
+        
+        for index, (_, future) in enumerate(batch):
+            error = failed.get(index) or batch_error
+            metrics.inc("write_batch_documents_total", {**labels, "outcome": "failed" if error else "ok"})
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    async def close(self):
+        """Flush everything queued and wait for in-flight batches; later inserts go straight through."""
+        self._closed = True
+        self._flush("shutdown")
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "flushing": len(self._flushes)}
+
+message_writes = WriteBatcher("messages", WRITE_BATCH_MAX_SIZE, WRITE_BATCH_MAX_DELAY_MS / 1000, WRITE_BATCHING_ENABLED)
+feedback_writes = WriteBatcher("feedback", WRITE_BATCH_MAX_SIZE, WRITE_BATCH_MAX_DELAY_MS / 1000, WRITE_BATCHING_ENABLED)
+
+
+# --- Password hashing ---
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, size-bounded thread pool.
+
+    Work beyond `workers` waits in a queue of at most `max_queue` jobs;
+    anything past that is rejected immediately with a 503 instead of
+    piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry",
+                headers={"Retry-After": "1"}
+            )
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(fn, *args)
+        self.in_flight += 1
+
+        def release(done):
+            # The loop may already be closed when a late job finishes at shutdown
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(self._release, done)
+
+        # The slot is held until the job ends, not until the caller stops
+        # waiting: a cancelled caller's running job still occupies a thread
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        self.in_flight -= 1
+        if future.cancelled():
+            # Dropped from the queue before it ran, e.g. its caller was cancelled
+            return
+        if future.exception() is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    async def hash_many(self, passwords) -> list:
+        """Hash a batch in parallel across the pool, bypassing admission control (for seeding)."""
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(self._executor, pwd_context.hash, password) for password in passwords
+        ])
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(PASSWORD_WORKERS, PASSWORD_QUEUE_SIZE)
+
+
+# --- Helper functions ---
+async def verify_password(plain_password, hashed_password):
+    """Return (valid, new_hash); new_hash is set when the stored hash should be upgraded."""
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await password_hasher.run(pwd_context.hash, password)
+
+def create_access_token(data: dict):
+    to_encode = data.copy()
+    expire = datetime.now(timezone.utc) + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
+    to_encode.update({"exp": expire})
+    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return encoded_jwt
+
+def create_stream_ticket(user_id: str) -> str:
+    expire = datetime.now(timezone.utc) + timedelta(seconds=STREAM_TICKET_TTL_SECONDS)
+    return jwt.encode({"sub": user_id, "scope": STREAM_TICKET_SCOPE, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, separators=(",", ":"), default=json_default).encode()
+
+def json_response(content, **kwargs):
+    """Send data the server wrote itself without re-validating or re-encoding it.
+
+    Returning a Response skips FastAPI's response_model validation and
+    jsonable_encoder pass, which dominate CPU time on large lists.
+    """
+    return Response(dumps(content), media_type="application/json", **kwargs)
+
+async def cursor_batches(cursor, size: int = STREAM_BATCH_SIZE):
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def stream_json_array(batches, transform=None):
+    """Stream a JSON array from an async iterator of document batches.
+
+    Only one batch is held in memory at a time; `transform` may enrich a
+    batch (e.g. attach_user_names) before it is encoded.
+    """
+    async def body():
+        yield b"["
+        first = True
+        async for batch in batches:
+            if transform is not None:
+                await transform(batch)
+            for doc in batch:
+                yield (b"" if first else b",") + dumps(doc)
+                first = False
+        yield b"]"
+    return StreamingResponse(body(), media_type="application/json")
+
+def encode_cursor(*values) -> str:
+    # Datetimes are tagged so they decode back to dates and compare against BSON dates
+    values = [{"$date": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != size:
+            raise ValueError
+        return [
+            parse_timestamp(datetime.fromisoformat(value["$date"])) if isinstance(value, dict) else value
+            for value in values
+        ]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_before(sort_field: str, sort_value, id_field: str, id_value) -> dict:
+    """Filter for rows strictly after a cursor in (sort_field desc, id_field desc) order."""
+    return {"$or": [
+        {sort_field: {"$lt": sort_value}},
+        {sort_field: sort_value, id_field: {"$lt": id_value}},
+    ]}
+
+def keyset_after(sort_field: str, sort_value, id_field: str, id_value) -> dict:
+    """Filter for rows strictly after a cursor in (sort_field asc, id_field asc) order."""
+    return {"$or": [
+        {sort_field: {"$gt": sort_value}},
+        {sort_field: sort_value, id_field: {"$gt": id_value}},
+    ]}
+
+def conversation_id_for(user_a: str, user_b: str) -> str:
+    return ":".join(sorted((user_a, user_b)))
+
+# Everything the API serves about a user; the password hash stays in the database
+USER_PROJECTION = {"_id": 0, "password_hash": 0}
+
+async def load_user(user_id: str):
+    return await db.users.find_one({"id": user_id}, USER_PROJECTION)
+
+async def update_user_fields(user: dict, fields: dict) -> dict:
+    """Apply a profile change, bump the version and refresh every cached copy of the user."""
+    fields["updated_at"] = utc_now()
+    updated_user = await db.users.find_one_and_update(
+        {"id": user["id"]},
+        {"$set": fields, "$inc": {"version": 1}},
+        projection=USER_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
+    user_cache.invalidate(user["id"])
+    if updated_user["role"] == "mentor":
+        mentor_index.upsert(updated_user)
+        mentor_matcher.upsert(updated_user)
+    return updated_user
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    return await user_from_token(credentials.credentials)
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+async def user_from_token(token: str, scope: Optional[str] = None):
+    """The user a token belongs to. Access tokens carry no scope; a scoped ticket is only accepted where asked for."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+        if user_id is None or payload.get("scope") != scope:
+            raise HTTPException(status_code=401, detail="Invalid authentication")
+        user = await user_cache.get(user_id, load_user)
+        if user is None:
+            raise HTTPException(status_code=401, detail="User not found")
+        return user
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired")
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+
+
+# --- User enrichment ---
+async def fetch_users_by_ids(user_ids, fields=("name",)) -> dict:
+    """Resolve many user ids with a single `$in` query, keyed by id."""
+    ids = list({uid for uid in user_ids if uid})
+    if not ids:
+        return {}
+    projection = {"_id": 0, "id": 1}
+    projection.update({field: 1 for field in fields})
+    users = await db.users.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+    return {user["id"]: user for user in users}
+
+async def attach_user_names(docs: list, name_fields: dict) -> list:
+    """Fill in user names on `docs` in one pass.
+
+    `name_fields` maps the id key on each document to the key that should
+    receive the name, e.g. {"student_id": "student_name"}.
+    """
+    users = await fetch_users_by_ids(doc.get(id_key) for doc in docs for id_key in name_fields)
+    for doc in docs:
+        for id_key, name_key in name_fields.items():
+            user = users.get(doc.get(id_key))
+            doc[name_key] = user["name"] if user else "Unknown"
+    return docs
+
+async def lookup_users(user_ids: List[str], fields: Optional[List[str]] = None) -> dict:
+    """Public profiles for many ids in one query, keyed by id, plus the ids that don't exist.
+
+    Only `fields` are read from Mongo. Absent fields get their UserResponse
+    defaults so results look like the single-user endpoint without paying
+    for a model validation per user.
+    """
+    ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+    if len(ids) > USER_LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {USER_LOOKUP_MAX_IDS} ids per lookup")
+    fields = list(dict.fromkeys(fields or UserResponse.model_fields))
+    unknown = set(fields) - set(UserResponse.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    
+    users = await fetch_users_by_ids(ids, fields)
+    defaults = {field: UserResponse.model_fields[field].get_default() for field in fields}
+    return {
+        "users": {uid: {**defaults, **users[uid]} for uid in ids if uid in users},
+        "missing": [uid for uid in ids if uid not in users],
+    }
+
+
+# --- Indexes ---
+# Every index the routes rely on. Applied idempotently on startup.
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("role", ASCENDING)]),
+    ],
+    "sessions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("student_id", ASCENDING), ("status", ASCENDING)]),
+        IndexModel([("mentor_id", ASCENDING), ("status", ASCENDING)]),
+        # Admin listing: each equality filter followed by the keyset sort
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("mentor_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("student_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("date", DESCENDING), ("id", DESCENDING)]),
+        # One active booking per mentor slot; cancelling unsets slot_held to free it
+        IndexModel(
+            [("mentor_id", ASCENDING), ("start", ASCENDING)],
+            unique=True, partialFilterExpression={"slot_held": True}, name="mentor_slot_unique"
+        ),
+    ],
+    "messages": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("from_user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("to_user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("conversation_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    "conversations": [
+        IndexModel([("user_id", ASCENDING), ("counterpart_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("last_message_at", DESCENDING), ("counterpart_id", DESCENDING)]),
+    ],
+    "feedback": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("to_user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+}
+# Archives answer the same reads as their hot collections; slot holds only matter while a session is open
+INDEXES["messages_archive"] = list(INDEXES["messages"])
+INDEXES["sessions_archive"] = [index for index in INDEXES["sessions"] if index.document.get("name") != "mentor_slot_unique"]
+
+# Representative query shape for each route: (name, collection, filter, sort).
+# audit_query_plans() explains each one and flags any collection scan.
+QUERY_SHAPES = [
+    ("get_current_user", "users", {"id": "u"}, None),
+    ("login", "users", {"email": "u@example.com"}, None),
+    ("enrichment", "users", {"id": {"$in": ["u", "v"]}}, None),
+    ("get_sessions:student", "sessions", {"student_id": "u"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("get_sessions:mentor", "sessions", {"mentor_id": "u"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("get_analytics:status", "sessions", {"mentor_id": "u", "status": "completed"}, None),
+    ("update_session_status", "sessions", {"id": "s"}, None),
+    ("mentor_slots", "sessions", {"mentor_id": "u", "slot_held": True, "start": {"$gte": "a", "$lt": "b"}}, None),
+    ("admin_sessions", "sessions", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("admin_sessions:status", "sessions", {"status": "pending"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("admin_sessions:mentor", "sessions", {"mentor_id": "u"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("admin_sessions:student", "sessions", {"student_id": "u"}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("admin_sessions:date", "sessions", {"date": {"$gte": "2026-01-01"}}, [("date", ASCENDING), ("id", ASCENDING)]),
+    ("get_messages", "messages", {"$or": [{"from_user_id": "u"}, {"to_user_id": "u"}]}, [("created_at", DESCENDING)]),
+    ("get_conversation_messages", "messages", {"conversation_id": "u:v"},
+     [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("mark_messages_read", "messages", {"conversation_id": "u:v", "to_user_id": "u", "read": False}, None),
+    ("get_conversations", "conversations", {"user_id": "u"},
+     [("last_message_at", DESCENDING), ("counterpart_id", DESCENDING)]),
+    ("get_user_feedback", "feedback", {"to_user_id": "u"}, None),
+    ("timeseries:sessions", "sessions", {"mentor_id": "u", "created_at": {"$gte": datetime(2026, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("timeseries:messages", "messages", {"to_user_id": "u", "created_at": {"$gte": datetime(2026, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("timeseries:feedback", "feedback", {"created_at": {"$gte": datetime(2026, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("archive:messages", "messages", {"read": True, "created_at": {"$lt": datetime(2026, 1, 1, tzinfo=timezone.utc)}}, None),
+    ("archive:sessions", "sessions",
+     {"status": {"$in": ["completed", "cancelled"]}, "created_at": {"$lt": datetime(2026, 1, 1, tzinfo=timezone.utc)}}, None),
+]
+
+async def ensure_indexes():
+    """Create every registered index, logging any that existing data prevents instead of failing.
+
+    A unique index over legacy duplicates (two users with one email) cannot
+    be built; the rest still are, and scripts/dedupe_users.py resolves the
+    duplicates so the next start can build it.
+    """
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure:
+            # The batch stops at the first failure; retry one by one to find it
+            for index in indexes:
+                try:
+                    await db[collection].create_indexes([index])
+                except OperationFailure as exc:
+                    logger.error("Index %s on %s not built: %s", index.document["name"], collection, exc)
+
+def plan_stages(plan: dict) -> set:
+    """Collect every stage name in an explain() plan tree."""
+    plan = plan.get("queryPlan", plan)
+    stages = {plan.get("stage")}
+    for child in [plan.get("inputStage")] + plan.get("inputStages", []):
+        if child:
+            stages |= plan_stages(child)
+    return stages
+
+async def audit_query_plans() -> list:
+    """Explain every registered query shape and return the names that COLLSCAN."""
+    collscans = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        if "COLLSCAN" in plan_stages(plan["queryPlanner"]["winningPlan"]):
+            collscans.append(name)
+    return collscans
+
+
+# --- Conversations ---
+def unread_counter_id(user_id: str) -> str:
+    return f"unread:{user_id}"
+
+async def record_conversation_message(message: dict):
+    """Update both participants' conversation rows for a newly sent message."""
+    last_message = {k: message[k] for k in ("id", "from_user_id", "to_user_id", "content", "created_at")}
+    sender, recipient = message["from_user_id"], message["to_user_id"]
+    ops = [
+        UpdateOne(
+            {"user_id": sender, "counterpart_id": recipient},
+            {"$set": {"last_message": last_message, "last_message_at": message["created_at"]},
+             "$setOnInsert": {"unread_count": 0}},
+            upsert=True,
+        ),
+    ]
+    if recipient != sender:
+        ops.append(UpdateOne(
+            {"user_id": recipient, "counterpart_id": sender},
+            {"$set": {"last_message": last_message, "last_message_at": message["created_at"]},
+             "$inc": {"unread_count": 1}},
+            upsert=True,
+        ))
+        await asyncio.gather(
+            db.conversations.bulk_write(ops, ordered=False),
+            db.counters.update_one({"_id": unread_counter_id(recipient)}, {"$inc": {"total": 1}}, upsert=True),
+        )
+    else:
+        await db.conversations.bulk_write(ops, ordered=False)
+
+async def rebuild_conversation(user_a: str, user_b: str):
+    """Recompute both participants' conversation rows from the messages between them."""
+    between = {"$or": [{"from_user_id": user_a, "to_user_id": user_b}, {"from_user_id": user_b, "to_user_id": user_a}]}
+    latest = await find_page("messages", between, [("created_at", DESCENDING), ("id", DESCENDING)], 1)
+    if not latest:
+        return
+    last_message = {k: latest[0][k] for k in ("id", "from_user_id", "to_user_id", "content", "created_at")}
+    ops = []
+    for user_id, counterpart_id in {(user_a, user_b), (user_b, user_a)}:
+        # Unread rows are never archived, so the hot collection has them all
+        unread = 0 if user_id == counterpart_id else await db.messages.count_documents(
+            {"from_user_id": counterpart_id, "to_user_id": user_id, "read": False}
+        )
+        ops.append(UpdateOne(
+            {"user_id": user_id, "counterpart_id": counterpart_id},
+            {"$set": {"last_message": last_message, "last_message_at": last_message["created_at"], "unread_count": unread}},
+            upsert=True,
+        ))
+    await db.conversations.bulk_write(ops, ordered=False)
+
+async def backfill_conversations(batch_size: int = 1000, progress=None) -> int:
+    """Stamp messages stored before threads existed with a conversation_id and rebuild their threads.
+
+    Works through hot and archived messages still lacking conversation_id.
+    Each batch's conversation rows are recomputed from the messages before
+    the batch is stamped, so an interrupted run leaves those messages for
+    the next one and repeating a batch is harmless. Unread totals are not
+    touched; run rebuild_unread_counters() afterwards. Returns messages stamped.
+    """
+    stamped = 0
+    for collection in ("messages", archive_of("messages")):
+        query = {"conversation_id": {"$exists": False}}
+        while True:
+            batch = await db[collection].find(query, {"_id": 1, "from_user_id": 1, "to_user_id": 1}).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+            by_pair = {}
+            for message in batch:
+                pair = tuple(sorted((message["from_user_id"], message["to_user_id"])))
+                by_pair.setdefault(pair, []).append(message["_id"])
+            await asyncio.gather(*(rebuild_conversation(*pair) for pair in by_pair))
+            
+            result = await db[collection].bulk_write(
+                [UpdateMany({"_id": {"$in": ids}, **query}, {"$set": {"conversation_id": conversation_id_for(*pair)}})
+                 for pair, ids in by_pair.items()],
+                ordered=False
+            )
+            stamped += result.modified_count
+            if progress is not None:
+                progress(collection, stamped)
+    return stamped
+
+async def rebuild_unread_counters():
+    """Recompute every user's unread total from their conversation rows."""
+    pipeline = [
+        {"$match": {"unread_count": {"$gt": 0}, "$expr": {"$ne": ["$user_id", "$counterpart_id"]}}},
+        {"$group": {"_id": {"$concat": ["unread:", "$user_id"]}, "total": {"$sum": "$unread_count"}}},
+        {"$merge": {"into": "counters", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    await db.conversations.aggregate(pipeline).to_list(None)
+
+
+# --- Analytics ---
+USER_ROLES = ("student", "mentor", "admin")
+# Admins are created by other admins or seeding, never through /auth/register
+SELF_REGISTER_ROLES = ("student", "mentor")
+SESSION_STATUSES = ("pending", "confirmed", "completed", "cancelled")
+OPEN_SESSION_STATUSES = ("pending", "confirmed")
+PLATFORM_COUNTERS_ID = "platform"
+# Time series metric -> (collection, field naming the mentor)
+TIMESERIES_SOURCES = {
+    "sessions": ("sessions", "mentor_id"),
+    "messages": ("messages", "to_user_id"),
+    "feedback": ("feedback", "to_user_id"),
+}
+TIMESERIES_MAX_BUCKETS = 366
+
+async def session_status_counts(match: dict) -> dict:
+    """Count one participant's sessions per status, e.g. match={"mentor_id": uid}.
+
+    Hot sessions are counted in a single $group; archived ones come from
+    their materialized tally rather than a scan of the archive.
+    """
+    (owner_field, user_id), = match.items()
+    rows, archived = await asyncio.gather(
+        db.sessions.aggregate([
+            {"$match": match},
+            {"$group": {"_id": {"$ifNull": ["$status", "pending"]}, "count": {"$sum": 1}}},
+        ]).to_list(None),
+        db.counters.find_one({"_id": archived_sessions_counter_id(owner_field, user_id)}, {"_id": 0}),
+    )
+    counts = dict.fromkeys(SESSION_STATUSES, 0)
+    for status, count in (archived or {}).items():
+        counts[status] = counts.get(status, 0) + count
+    for row in rows:
+        counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+    return counts
+
+async def compute_platform_counters() -> dict:
+    """Users per role and sessions per status, as two concurrent $group pipelines plus the archived tally."""
+    user_rows, session_rows, archived = await asyncio.gather(
+        db.users.aggregate([
+            {"$group": {"_id": {"$ifNull": ["$role", "unknown"]}, "count": {"$sum": 1}}},
+        ]).to_list(None),
+        db.sessions.aggregate([
+            {"$group": {"_id": {"$ifNull": ["$status", "pending"]}, "count": {"$sum": 1}}},
+        ]).to_list(None),
+        db.counters.find_one({"_id": ARCHIVED_SESSIONS_COUNTER_ID}, {"_id": 0}),
+    )
+    counters = {"users": dict.fromkeys(USER_ROLES, 0), "sessions": dict.fromkeys(SESSION_STATUSES, 0)}
+    counters["users"].update({row["_id"]: row["count"] for row in user_rows})
+    counters["sessions"].update(archived or {})
+    for row in session_rows:
+        counters["sessions"][row["_id"]] = counters["sessions"].get(row["_id"], 0) + row["count"]
+    return counters
+
+async def rebuild_platform_counters() -> dict:
+    counters = await compute_platform_counters()
+    await db.counters.replace_one({"_id": PLATFORM_COUNTERS_ID}, counters, upsert=True)
+    return counters
+
+async def get_platform_counters() -> dict:
+    if not MATERIALIZED_COUNTERS:
+        return await compute_platform_counters()
+    counters = await db.counters.find_one({"_id": PLATFORM_COUNTERS_ID}, {"_id": 0})
+    if counters is None:
+        counters = await rebuild_platform_counters()
+    return counters
+
+async def bump_platform_counters(increments: dict):
+    """Apply {"sessions.pending": 1, ...} to the materialized counters.
+
+    Never upserts: until rebuild_platform_counters() creates the document,
+    a partial one would be read back as the full totals.
+    """
+    if MATERIALIZED_COUNTERS and increments:
+        await db.counters.update_one({"_id": PLATFORM_COUNTERS_ID}, {"$inc": increments})
+
+
+# --- Ratings ---
+RATING_STARS = (1, 2, 3, 4, 5)
+
+async def apply_rating(user_id: str, rating: int) -> Optional[dict]:
+    """Fold one rating into the user's running aggregates; returns the new rating and updated_at.
+
+    Sum, count, histogram bucket and the rounded average are updated in a
+    single pipeline update, so concurrent feedback never loses a vote. A
+    user without aggregates yet (rated before they existed, or never rated)
+    is seeded from db.feedback instead, which must already hold this rating.
+    """
+    user = await db.users.find_one_and_update(
+        {"id": user_id, "rating_count": {"$exists": True}},
+        [
+            {"$set": {
+                "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, rating]},
+                "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, 1]},
+                f"rating_histogram.{rating}": {"$add": [{"$ifNull": [f"$rating_histogram.{rating}", 0]}, 1]},
+                "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+                "updated_at": {"$literal": utc_now()},
+            }},
+            {"$set": {"rating": {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 1]}}},
+        ],
+        projection={"_id": 0, "rating": 1, "updated_at": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is None:
+        await reconcile_ratings([user_id])
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "rating": 1, "updated_at": 1})
+    return user
+
+async def reconcile_ratings(user_ids: Optional[List[str]] = None, batch_size: int = 1000) -> int:
+    """Rebuild rating aggregates from the feedback collection; returns users updated."""
+    pipeline = []
+    if user_ids:
+        pipeline.append({"$match": {"to_user_id": {"$in": user_ids}}})
+    group = {"_id": "$to_user_id", "rating_sum": {"$sum": "$rating"}, "rating_count": {"$sum": 1}}
+    group.update({f"stars_{n}": {"$sum": {"$cond": [{"$eq": ["$rating", n]}, 1, 0]}} for n in RATING_STARS})
+    pipeline.append({"$group": group})
+    
+    updated = 0
+    ops = []
+    async for row in db.feedback.aggregate(pipeline):
+        ops.append(UpdateOne({"id": row["_id"]}, {
+            "$set": {
+                "rating_sum": row["rating_sum"],
+                "rating_count": row["rating_count"],
+                "rating_histogram": {str(n): row[f"stars_{n}"] for n in RATING_STARS},
+                "rating": round(row["rating_sum"] / row["rating_count"], 1),
+                "updated_at": utc_now(),
+            },
+            "$inc": {"version": 1},
+        }))
+        if len(ops) >= batch_size:
+            updated += (await db.users.bulk_write(ops, ordered=False)).matched_count
+            ops = []
+    if ops:
+        updated += (await db.users.bulk_write(ops, ordered=False)).matched_count
+    
+    user_cache.clear()
+    return updated
+
+
+# --- Availability ---
+def clock_minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def parse_slot_start(date_value: str, time_value: str) -> datetime:
+    try:
+        start = datetime.strptime(f"{date_value} {time_value}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Date must be YYYY-MM-DD and time HH:MM")
+    return start.replace(tzinfo=timezone.utc)
+
+ALWAYS_AVAILABLE = [{"weekday": weekday, "start": "00:00", "end": "24:00"} for weekday in range(7)]
+
+def mentor_availability(mentor: dict) -> list:
+    # Mentors who never published availability can be booked on any slot boundary;
+    # an empty list is a published "no bookings" and offers nothing
+    availability = mentor.get("availability")
+    return ALWAYS_AVAILABLE if availability is None else availability
+
+def slot_offered(availability: list, start: datetime) -> bool:
+    """Whether `start` begins a whole slot inside one of the mentor's weekly windows."""
+    minute = start.hour * 60 + start.minute
+    for window in availability:
+        window_start, window_end = clock_minutes(window["start"]), clock_minutes(window["end"])
+        if (window["weekday"] == start.weekday() and window_start <= minute
+                and minute + SESSION_SLOT_MINUTES <= window_end
+                and (minute - window_start) % SESSION_SLOT_MINUTES == 0):
+            return True
+    return False
+
+def availability_slots(availability: list, first_day: date, last_day: date) -> list:
+    """Every slot start the weekly windows offer between two dates, in order."""
+    by_weekday = {}
+    for window in availability:
+        by_weekday.setdefault(window["weekday"], []).append(
+            (clock_minutes(window["start"]), clock_minutes(window["end"]))
+        )
+    
+    starts = set()
+    day = first_day
+    while day <= last_day:
+        midnight = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        for window_start, window_end in by_weekday.get(day.weekday(), ()):
+            for minute in range(window_start, window_end - SESSION_SLOT_MINUTES + 1, SESSION_SLOT_MINUTES):
+                starts.add(midnight + timedelta(minutes=minute))
+        day += timedelta(days=1)
+    return sorted(starts)
+
+async def booked_slot_starts(mentor_id: str, range_start: datetime, range_end: datetime) -> set:
+    """Starts of the mentor's held slots in [range_start, range_end), via the (mentor_id, start) index."""
+    cursor = db.sessions.find(
+        {
+            "mentor_id": mentor_id,
+            "slot_held": True,
+            "start": {"$gte": range_start, "$lt": range_end},
+        },
+        {"_id": 0, "start": 1}
+    )
+    return {parse_timestamp(doc["start"]) async for doc in cursor}
+
+
+# --- Real-time messaging ---
+class PubSubBackend(ABC):
+    """Transport that carries hub events, possibly between workers.
+
+    publish() hands an event to the transport; the transport calls the
+    `deliver(user_id, event)` callback given to start() for every event
+    that should reach this worker's local subscribers.
+    """
+
+    def _deliver(self, user_id: str, event: dict):
+        """No subscribers until start() installs the hub's callback."""
+
+    async def start(self, deliver):
+        self._deliver = deliver
+
+    @abstractmethod
+    async def publish(self, user_id: str, event: dict):
+        """Send `event` for `user_id` to every worker's subscribers."""
+
+    async def close(self):
+        pass
+
+class InProcessBackend(PubSubBackend):
+    """Delivers straight to local subscribers; enough for a single worker."""
+
+    async def publish(self, user_id: str, event: dict):
+        self._deliver(user_id, event)
+
+class MongoChangeStreamBackend(PubSubBackend):
+    """Shares messages between workers through a change stream on `messages`.
+
+    The insert itself is the publish, so publish() is a no-op. Requires a
+    replica set (change streams are unavailable on standalone mongod).
+    """
+
+    def __init__(self):
+        self._task = None
+
+    async def start(self, deliver):
+        await super().start(deliver)
+        self._task = asyncio.create_task(self._watch())
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": "insert"}}]
+        while True:
+            try:
+                async with db.messages.watch(pipeline) as stream:
+                    async for change in stream:
+                        message = change["fullDocument"]
+                        message.pop("_id", None)
+                        await attach_user_names([message], {"from_user_id": "from_user_name", "to_user_id": "to_user_name"})
+                        for user_id in {message["from_user_id"], message["to_user_id"]}:
+                            self._deliver(user_id, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Message change stream failed; reconnecting")
+                await asyncio.sleep(1)
+
+    async def publish(self, user_id: str, event: dict):
+        pass
+
+    async def close(self):
+        # Nothing to stop if start() never ran, e.g. startup was still warming up
+        if self._task is None:
+            return
+        self._task.cancel()
+        # Let the change stream's context exit before the client is closed
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+class MessageHub:
+    """Fans new messages out to the live streams of their participants.
+
+    Each stream owns a small bounded queue. A stream that falls too far
+    behind is sent RESYNC and closed; the client reconnects and catches up
+    from its last cursor instead of the hub buffering without limit.
+    """
+
+    RESYNC = object()
+
+    def __init__(self, backend: PubSubBackend, queue_size: int):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers = {}  # user_id -> set of queues
+        self.delivered = 0
+        self.overflows = 0
+
+    async def start(self):
+        await self.backend.start(self._deliver)
+
+    async def close(self):
+        await self.backend.close()
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    async def publish_message(self, message: dict):
+        for user_id in {message["from_user_id"], message["to_user_id"]}:
+            await self.backend.publish(user_id, message)
+
+    def _deliver(self, user_id: str, event: dict):
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.overflows += 1
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.RESYNC)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._subscribers),
+            "connections": sum(len(queues) for queues in self._subscribers.values()),
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+        }
+
+message_hub = MessageHub(
+    MongoChangeStreamBackend() if MESSAGE_HUB_BACKEND == "mongo" else InProcessBackend(),
+    MESSAGE_STREAM_QUEUE_SIZE,
+)
+
+def format_sse(event: str, data: dict, event_id: Optional[str] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {dumps(data).decode()}"]
+    return "\n".join(lines) + "\n\n"
+
+
+# --- HTTP caching ---
+def parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        try:
+            return parse_timestamp(datetime.fromisoformat(value))
+        except ValueError:
+            return None
+    return None
+
+def make_etag(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match (weak comparison) and, failing that, If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def conditional_response(request: Request, render, etag: str, cache_control: str,
+                         last_modified: Optional[datetime] = None) -> Response:
+    """Answer 304 when the client's copy is current, otherwise call `render` for the body."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(render(), media_type="application/json", headers=headers)
+
+def parse_byte_range(header: Optional[str], length: int) -> Optional[tuple]:
+    """Inclusive (start, end) for a single `bytes=` range, or None to send the whole body.
+    
+    Multi-range and malformed headers are ignored, which RFC 9110 allows; a range
+    that lies entirely past the end is answered with 416.
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if not match or not (match[1] or match[2]):
+        return None
+    if match[1]:
+        start = int(match[1])
+        end = min(int(match[2]), length - 1) if match[2] else length - 1
+    else:
+        start, end = max(length - int(match[2]), 0), length - 1
+    if start >= length or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{length}"})
+    return start, end
+
+
+# --- Photos ---
+PHOTO_ID_PATTERN = re.compile(r"[0-9a-f]{64}")
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """Content type from the file's magic bytes; clients' Content-Type headers are not trusted."""
+    for signature, media_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+def photo_key(photo_id: str, size: Optional[int] = None) -> str:
+    return photo_id if size is None else f"{photo_id}_{size}"
+
+def photo_url(photo_id: str, size: Optional[int] = None) -> str:
+    return f"/api/photos/{photo_id}" if size is None else f"/api/photos/{photo_id}?size={size}"
+
+def make_thumbnails(data: bytes) -> dict:
+    """Downscaled copies of an image keyed by their bounding size. CPU-bound; run off the loop."""
+    if Image is None:
+        return {}
+    thumbnails = {}
+    with Image.open(io.BytesIO(data)) as image:
+        if image.width * image.height > PHOTO_MAX_PIXELS:
+            raise HTTPException(status_code=413, detail=f"Photos are limited to {PHOTO_MAX_PIXELS} pixels")
+        image.load()
+        for size in PHOTO_THUMBNAIL_SIZES:
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size))
+            out = io.BytesIO()
+            if thumbnail.mode in ("RGBA", "LA", "P"):
+                thumbnail.save(out, "PNG", optimize=True)
+            else:
+                thumbnail.convert("RGB").save(out, "JPEG", quality=85, optimize=True)
+            thumbnails[size] = out.getvalue()
+    return thumbnails
+
+class PhotoStore(ABC):
+    """Blob storage for photos keyed by content hash, so writes are idempotent."""
+    
+    @abstractmethod
+    async def put(self, key: str, data: bytes):
+        ...
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+class DiskPhotoStore(PhotoStore):
+    def __init__(self, root: Path):
+        self.root = root
+    
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+    
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial file
+        temp = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
+    
+    async def put(self, key: str, data: bytes):
+        await asyncio.to_thread(self._write, key, data)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await asyncio.to_thread(self._path(key).read_bytes)
+        except FileNotFoundError:
+            return None
+
+class GridFSPhotoStore(PhotoStore):
+    """Photos in the `photos` GridFS bucket of the application database."""
+    
+    def _bucket(self):
+        return AsyncIOMotorGridFSBucket(db, bucket_name="photos")
+    
+    async def put(self, key: str, data: bytes):
+        if await db["photos.files"].find_one({"filename": key}, {"_id": 1}):
+            return
+        await self._bucket().upload_from_stream(key, data)
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            stream = await self._bucket().open_download_stream_by_name(key)
+        except NoFile:
+            return None
+        return await stream.read()
+
+photo_store = GridFSPhotoStore() if PHOTO_STORE_BACKEND == "gridfs" else DiskPhotoStore(PHOTO_STORE_PATH)
+# Errors Pillow raises for corrupt or hostile files; DecompressionBombError is not an OSError
+PHOTO_DECODE_ERRORS = (OSError, ValueError) + ((Image.DecompressionBombError,) if Image is not None else ())
+
+async def store_photo(data: bytes) -> tuple:
+    """Validate and store an image plus its thumbnails; returns (photo_id, thumbnail sizes)."""
+    if sniff_image_type(data) is None:
+        raise HTTPException(status_code=415, detail="Photos must be JPEG, PNG, GIF or WebP")
+    photo_id = hashlib.sha256(data).hexdigest()
+    try:
+        thumbnails = await asyncio.to_thread(make_thumbnails, data)
+    except PHOTO_DECODE_ERRORS:
+        raise HTTPException(status_code=400, detail="Photo could not be decoded")
+    await asyncio.gather(
+        photo_store.put(photo_id, data),
+        *(photo_store.put(photo_key(photo_id, size), thumbnail) for size, thumbnail in thumbnails.items()),
+    )
+    return photo_id, sorted(thumbnails)
+
+
+# --- Mentor search ---
+class MentorSearchIndex:
+    """In-memory inverted index over mentor name, expertise, bio and college.
+
+    Query tokens match indexed terms exactly, by prefix, or within one edit
+    (via a deletion neighbourhood, so typo lookups never scan the whole
+    vocabulary). Every query token must match; results are ranked by the
+    summed match quality plus a rating boost.
+    """
+
+    FIELD_WEIGHTS = {"name": 3.0, "expertise": 2.5, "college": 1.0, "bio": 0.5}
+    EXACT, PREFIX, FUZZY = 1.0, 0.75, 0.5
+    RATING_BOOST = 0.2
+    MAX_PREFIX_EXPANSIONS = 50
+
+    def __init__(self):
+        self.generation = 0
+        self.last_modified = None
+        self._reset()
+
+    def _reset(self):
+        self._docs = {}  # mentor id -> UserResponse-shaped dict
+        self._doc_terms = {}  # mentor id -> {term: weight}
+        self._postings = {}  # term -> {mentor id: weight}
+        self._deletes = {}  # term with one char removed (or the term itself) -> {terms}
+        self._sorted_terms = None
+        self._expertise_counts = Counter()
+        self.generation += 1
+
+    @staticmethod
+    def tokenize(text) -> list:
+        return re.findall(r"[a-z0-9+#]+", text.lower()) if text else []
+
+    @staticmethod
+    def _one_char_deletes(term: str) -> set:
+        return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+    def _doc_term_weights(self, doc: dict) -> dict:
+        weights = {}
+        for field, weight in self.FIELD_WEIGHTS.items():
+            value = doc.get(field)
+            text = " ".join(value) if isinstance(value, list) else value
+            for term in self.tokenize(text):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        return weights
+
+    def upsert(self, doc: dict):
+        mentor_id = doc["id"]
+        self._discard(mentor_id)
+        # Validate once on write so reads can be served without re-validation
+        self._docs[mentor_id] = UserResponse(**doc).model_dump()
+        self.generation += 1
+        modified = parse_timestamp(doc.get("updated_at") or doc.get("created_at"))
+        if modified is not None and (self.last_modified is None or modified > self.last_modified):
+            self.last_modified = modified
+        self._expertise_counts.update(doc.get("expertise") or [])
+        terms = self._doc_term_weights(doc)
+        self._doc_terms[mentor_id] = terms
+        for term, weight in terms.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._sorted_terms = None
+                for variant in self._one_char_deletes(term) | {term}:
+                    self._deletes.setdefault(variant, set()).add(term)
+            self._postings[term][mentor_id] = weight
+
+    def remove(self, mentor_id: str):
+        if self._discard(mentor_id):
+            self.mark_modified()
+
+    def _discard(self, mentor_id: str) -> bool:
+        doc = self._docs.pop(mentor_id, None)
+        if doc is not None:
+            self._expertise_counts.subtract(doc.get("expertise") or [])
+            self._expertise_counts += Counter()  # drop zero counts
+        for term in self._doc_terms.pop(mentor_id, {}):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(mentor_id, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+                for variant in self._one_char_deletes(term) | {term}:
+                    self._deletes.get(variant, set()).discard(term)
+        return doc is not None
+
+    def get(self, mentor_id: str) -> Optional[dict]:
+        return self._docs.get(mentor_id)
+
+    def mark_modified(self):
+        self.generation += 1
+        self.last_modified = datetime.now(timezone.utc)
+
+    def update_fields(self, mentor_id: str, fields: dict):
+        doc = self._docs.get(mentor_id)
+        if doc is not None:
+            self.upsert({**doc, **fields})
+
+    def rebuild(self, docs):
+        self._reset()
+        for doc in docs:
+            self.upsert(doc)
+
+    def _expand(self, token: str) -> dict:
+        """Map each indexed term matching `token` to its match quality."""
+        matches = {}
+        if token in self._postings:
+            matches[token] = self.EXACT
+        
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect.bisect_left(self._sorted_terms, token)
+        for term in self._sorted_terms[start:start + self.MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+            matches.setdefault(term, self.PREFIX)
+        
+        if len(token) >= 4:
+            for variant in self._one_char_deletes(token) | {token}:
+                for term in self._deletes.get(variant, ()):
+                    matches.setdefault(term, self.FUZZY)
+        return matches
+
+    def search(self, query: Optional[str] = None, expertise: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE, offset: int = 0) -> dict:
+        scores = None
+        for token in self.tokenize(query):
+            token_scores = {}
+            for term, quality in self._expand(token).items():
+                for mentor_id, weight in self._postings[term].items():
+                    token_scores[mentor_id] = max(token_scores.get(mentor_id, 0.0), quality * weight)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {mentor_id: scores[mentor_id] + score
+                          for mentor_id, score in token_scores.items() if mentor_id in scores}
+        # Facets reflect the text match, before the expertise filter narrows it
+        if scores is None:
+            scores = dict.fromkeys(self._docs, 0.0)
+            facets = self._expertise_counts
+        else:
+            facets = Counter(
+                value for mentor_id in scores for value in (self._docs[mentor_id].get("expertise") or [])
+            )
+        
+        if expertise:
+            needle = expertise.lower()
+            scores = {
+                mentor_id: score for mentor_id, score in scores.items()
+                if any(needle in value.lower() for value in (self._docs[mentor_id].get("expertise") or []))
+            }
+        
+        ranked = heapq.nsmallest(
+            offset + limit,
+            scores,
+            key=lambda mentor_id: (
+                -(scores[mentor_id] + self.RATING_BOOST * (self._docs[mentor_id].get("rating") or 0.0)),
+                self._docs[mentor_id]["name"],
+            ),
+        )
+        return {
+            "items": [self._docs[mentor_id] for mentor_id in ranked[offset:]],
+            "total": len(scores),
+            "facets": {"expertise": dict(facets.most_common())},
+            "limit": limit,
+            "offset": offset,
+        }
+
+mentor_index = MentorSearchIndex()
+
+# Encoded bodies for unfiltered directory pages: (limit, offset) -> (generation, body, etag)
+directory_response_cache = OrderedDict()
+
+def directory_page(limit: int, offset: int):
+    """Encoded body and ETag for an unfiltered directory page, cached per index generation."""
+    key = (limit, offset)
+    cached = directory_response_cache.get(key)
+    if cached is not None and cached[0] == mentor_index.generation:
+        directory_response_cache.move_to_end(key)
+        return cached[1], cached[2]
+    body = dumps(mentor_index.search(None, None, limit, offset)["items"])
+    etag = make_etag(body)
+    directory_response_cache[key] = (mentor_index.generation, body, etag)
+    directory_response_cache.move_to_end(key)
+    while len(directory_response_cache) > DIRECTORY_RESPONSE_CACHE_SIZE:
+        directory_response_cache.popitem(last=False)
+    return body, etag
+
+async def refresh_mentor_index():
+    projection = {"_id": 0, "created_at": 1, "updated_at": 1}
+    projection.update({field: 1 for field in UserResponse.model_fields})
+    mentors, loads = await asyncio.gather(
+        db.users.find({"role": "mentor"}, projection).to_list(None),
+        open_session_loads(),
+    )
+    mentor_index.rebuild(mentors)
+    mentor_matcher.rebuild(mentors, loads)
+
+async def refresh_mentor_index_periodically():
+    """Pick up mentor changes made by other workers."""
+    while True:
+        await asyncio.sleep(MENTOR_INDEX_REFRESH_SECONDS)
+        try:
+            await refresh_mentor_index()
+        except Exception:
+            logger.exception("Refreshing mentor search index failed")
+
+
+# --- Recommendations ---
+class MentorMatcher:
+    """Scores every mentor for a student with a few vectorized numpy operations.
+
+    Each mentor owns a row in parallel arrays (tag norm, rating/experience
+    quality, open-session load penalty). The mentor-by-tag matrix is kept
+    column-compressed as the array of rows holding each tag, so a query
+    only touches the student's tags and a profile edit only rewrites that
+    mentor's columns. Tag overlap is cosine similarity over the tag sets.
+    """
+
+    TAG_WEIGHT = 1.0
+    RATING_WEIGHT = 0.3
+    EXPERIENCE_WEIGHT = 0.2
+    LOAD_PENALTY = 0.3
+    EXPERIENCE_CAP = 20  # years beyond this add nothing
+    LOAD_HALF = 5  # open sessions at which half the load penalty applies
+
+    def __init__(self, capacity: int = 1024):
+        self._rows = {}  # mentor id -> row
+        self._ids = []  # row -> mentor id, None once freed
+        self._free_rows = []
+        self._tags = {}  # mentor id -> set of tags
+        self._tag_rows = {}  # tag -> set of rows
+        self._tag_arrays = {}  # tag -> np.ndarray of rows, rebuilt lazily after edits
+        self._loads = {}  # mentor id -> open sessions
+        self._inv_norm = np.zeros(capacity, np.float32)
+        self._quality = np.zeros(capacity, np.float32)
+        self._penalty = np.zeros(capacity, np.float32)
+        self._active = np.zeros(capacity, bool)
+
+    @staticmethod
+    def tags_of(doc: dict) -> set:
+        return {
+            tag.strip().lower()
+            for field in ("expertise", "skills")
+            for tag in (doc.get(field) or [])
+            if tag and tag.strip()
+        }
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _grow(self):
+        capacity = len(self._active) * 2
+        for name in ("_inv_norm", "_quality", "_penalty", "_active"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _allocate_row(self, mentor_id: str) -> int:
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._ids)
+            if row == len(self._active):
+                self._grow()
+            self._ids.append(None)
+        self._rows[mentor_id] = row
+        self._ids[row] = mentor_id
+        return row
+
+    def _set_tags(self, mentor_id: str, row: int, tags: set):
+        old = self._tags.get(mentor_id, set())
+        for tag in old - tags:
+            rows = self._tag_rows[tag]
+            rows.discard(row)
+            if not rows:
+                del self._tag_rows[tag]
+            self._tag_arrays.pop(tag, None)
+        for tag in tags - old:
+            self._tag_rows.setdefault(tag, set()).add(row)
+            self._tag_arrays.pop(tag, None)
+        if tags:
+            self._tags[mentor_id] = tags
+        else:
+            self._tags.pop(mentor_id, None)
+        self._inv_norm[row] = 1.0 / np.sqrt(len(tags)) if tags else 0.0
+
+    def _set_load(self, mentor_id: str, load: int):
+        self._loads[mentor_id] = load
+        row = self._rows.get(mentor_id)
+        if row is not None:
+            self._penalty[row] = self.LOAD_PENALTY * load / (load + self.LOAD_HALF)
+
+    def upsert(self, doc: dict):
+        mentor_id = doc["id"]
+        row = self._rows.get(mentor_id)
+        if row is None:
+            row = self._allocate_row(mentor_id)
+        self._set_tags(mentor_id, row, self.tags_of(doc))
+        years = min(doc.get("years_experience") or 0, self.EXPERIENCE_CAP)
+        self._quality[row] = (
+            self.RATING_WEIGHT * (doc.get("rating") or 0.0) / 5
+            + self.EXPERIENCE_WEIGHT * years / self.EXPERIENCE_CAP
+        )
+        self._set_load(mentor_id, self._loads.get(mentor_id, 0))
+        self._active[row] = True
+
+    def remove(self, mentor_id: str):
+        row = self._rows.pop(mentor_id, None)
+        if row is None:
+            return
+        self._set_tags(mentor_id, row, set())
+        self._active[row] = False
+        self._ids[row] = None
+        self._free_rows.append(row)
+
+    def adjust_load(self, mentor_id: str, delta: int):
+        self._set_load(mentor_id, max(0, self._loads.get(mentor_id, 0) + delta))
+
+    def rebuild(self, docs, loads: dict):
+        self.__init__(max(1024, len(docs)))
+        self._loads = dict(loads)
+        for doc in docs:
+            self.upsert(doc)
+
+    def _rows_with(self, tag: str) -> np.ndarray:
+        rows = self._tag_arrays.get(tag)
+        if rows is None:
+            rows = np.fromiter(self._tag_rows[tag], np.intp, len(self._tag_rows[tag]))
+            self._tag_arrays[tag] = rows
+        return rows
+
+    def recommend(self, tags: set, limit: int) -> list:
+        """Top `limit` mentors for a student's tags as (mentor id, score, matched tags)."""
+        if not self._rows:
+            return []
+        n = len(self._ids)
+        overlap = np.zeros(n, np.float32)
+        for tag in tags:
+            if tag in self._tag_rows:
+                # Rows are unique per tag, so fancy-index increment is safe
+                overlap[self._rows_with(tag)] += 1.0
+        
+        scores = self._quality[:n] - self._penalty[:n]
+        if tags:
+            scores += self.TAG_WEIGHT / np.sqrt(len(tags)) * overlap * self._inv_norm[:n]
+        scores[~self._active[:n]] = -np.inf
+        
+        k = min(limit, len(self._rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self._ids[row], float(scores[row]), sorted(self._tags.get(self._ids[row], set()) & tags))
+            for row in top
+        ]
+
+mentor_matcher = MentorMatcher()
+
+async def open_session_loads() -> dict:
+    pipeline = [
+        {"$match": {"status": {"$in": list(OPEN_SESSION_STATUSES)}}},
+        {"$group": {"_id": "$mentor_id", "count": {"$sum": 1}}},
+    ]
+    return {row["_id"]: row["count"] async for row in db.sessions.aggregate(pipeline)}
+
+
+# --- Migrations ---
+# Timestamp fields that older versions stored as ISO strings
+DATETIME_FIELDS = {
+    "users": ("created_at", "updated_at"),
+    "sessions": ("created_at", "start"),
+    "messages": ("created_at",),
+    "conversations": ("last_message_at", "last_message.created_at"),
+    "feedback": ("created_at",),
+}
+
+def get_path(doc: dict, path: str):
+    for part in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(part)
+    return doc
+
+def legacy_session_start(doc: dict) -> Optional[datetime]:
+    """Slot start for a session booked before start existed, if its date and time parse."""
+    try:
+        start = datetime.strptime(f"{doc.get('date')} {doc.get('time')}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    return start.replace(tzinfo=timezone.utc)
+
+async def migrate_datetimes(collection: str, batch_size: int = 1000, restart: bool = False, progress=None) -> int:
+    """Convert one collection's ISO-string timestamps to BSON dates, online.
+
+    Walks the collection in _id order one batch at a time and checkpoints
+    the last _id in db.migrations, so an interrupted run resumes where it
+    stopped. Each update matches the string it read, so a concurrent write
+    to the same field is never overwritten. Returns documents converted.
+    """
+    checkpoint_id = f"datetimes:{collection}"
+    if restart:
+        await db.migrations.delete_one({"_id": checkpoint_id})
+    checkpoint = await db.migrations.find_one({"_id": checkpoint_id}) or {}
+    if checkpoint.get("done"):
+        return 0
+    
+    fields = DATETIME_FIELDS[collection]
+    projection = dict.fromkeys(fields, 1)
+    if collection == "sessions":
+        projection.update(date=1, time=1)
+    last_id = checkpoint.get("last_id")
+    converted = 0
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db[collection].find(query, projection).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        
+        ops = []
+        for doc in batch:
+            match, changes = {"_id": doc["_id"]}, {}
+            for field in fields:
+                value = get_path(doc, field)
+                if isinstance(value, str) and parse_timestamp(value) is not None:
+                    match[field] = value
+                    changes[field] = parse_timestamp(value)
+            if collection == "sessions" and get_path(doc, "start") is None:
+                start = legacy_session_start(doc)
+                if start is not None:
+                    match["start"] = None
+                    changes["start"] = start
+            if changes:
+                ops.append(UpdateOne(match, {"$set": changes}))
+        modified = (await db[collection].bulk_write(ops, ordered=False)).modified_count if ops else 0
+        converted += modified
+        
+        last_id = batch[-1]["_id"]
+        await db.migrations.update_one(
+            {"_id": checkpoint_id},
+            {"$set": {"last_id": last_id, "updated_at": utc_now()}, "$inc": {"converted": modified}},
+            upsert=True
+        )
+        if progress is not None:
+            progress(collection, converted)
+    
+    await db.migrations.update_one({"_id": checkpoint_id}, {"$set": {"done": True, "updated_at": utc_now()}}, upsert=True)
+    return converted
+
+
+def decode_data_uri(uri: str) -> Optional[bytes]:
+    header, _, payload = uri.partition(",")
+    if not header.startswith("data:") or not header.endswith(";base64"):
+        return None
+    try:
+        return base64.b64decode(payload, validate=True)
+    except ValueError:
+        return None
+
+async def offload_inline_photos(batch_size: int = 100, progress=None) -> tuple:
+    """Move profile photos stored inline as data URIs into the photo store.
 
-class SessionCreate(BaseModel):
-    mentor_id: str
-    date: str
-    time: str
-    notes: Optional[str] = None
+    Each user is updated only if the photo is still the one that was read,
+    so a concurrent upload wins. Photos that cannot be decoded or exceed
+    PHOTO_MAX_BYTES are left in place and counted as skipped. Safe to re-run.
+    Returns (moved, skipped).
+    """
+    moved = skipped = 0
+    last_id = None
+    while True:
+        query = {"photo": {"$regex": "^data:"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await db.users.find(query, {"id": 1, "photo": 1}).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        for user in batch:
+            data = decode_data_uri(user["photo"])
+            try:
+                if data is None or len(data) > PHOTO_MAX_BYTES:
+                    raise HTTPException(status_code=400)
+                photo_id, _ = await store_photo(data)
+            except HTTPException:
+                skipped += 1
+                continue
+            result = await db.users.update_one(
+                {"_id": user["_id"], "photo": user["photo"]},
+                {"$set": {"photo": photo_url(photo_id), "photo_id": photo_id, "updated_at": utc_now()},
+                 "$inc": {"version": 1}}
+            )
+            moved += result.modified_count
+            user_cache.invalidate(user["id"])
+        last_id = batch[-1]["_id"]
+        if progress is not None:
+            progress(moved, skipped)
+    return moved, skipped
 
-class Message(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    from_user_id: str
-    to_user_id: str
-    content: str
-    read: bool = False
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
-class MessageCreate(BaseModel):
-    to_user_id: str
-    content: str
 
-class Feedback(BaseModel):
-    model_config = ConfigDict(extra="ignore")
-    
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    session_id: str
-    from_user_id: str
-    to_user_id: str
-    rating: int
-    comment: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+# --- Archival ---
+# Collection -> (days kept hot, filter for rows that may leave). Unread messages
+# stay hot so unread counters and mark-as-read only ever deal with one tier.
+ARCHIVE_POLICIES = {
+    "messages": (MESSAGE_HOT_DAYS, {"read": True}),
+    "sessions": (SESSION_HOT_DAYS, {"status": {"$in": ["completed", "cancelled"]}}),
+}
+ARCHIVED_SESSIONS_COUNTER_ID = "archived_sessions"
 
-class FeedbackCreate(BaseModel):
-    session_id: str
-    to_user_id: str
-    rating: int
-    comment: Optional[str] = None
+def archive_of(collection: str) -> str:
+    return f"{collection}_archive"
 
-class ProfileUpdate(BaseModel):
-    name: Optional[str] = None
-    bio: Optional[str] = None
-    college: Optional[str] = None
-    skills: Optional[List[str]] = None
-    expertise: Optional[List[str]] = None
-    years_experience: Optional[int] = None
-    photo: Optional[str] = None
+def archived_sessions_counter_id(owner_field: str, user_id: str) -> str:
+    return f"{ARCHIVED_SESSIONS_COUNTER_ID}:{owner_field}:{user_id}"
 
+archive_horizons = {}  # collection -> (expires_at, horizon)
 
-# --- Helper functions ---
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def archive_horizon(collection: str, refresh: bool = False) -> Optional[datetime]:
+    """Every archived row was created before this; None while nothing has been archived.
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+    The horizon only moves when the archiver runs, so listings use a copy
+    cached for ARCHIVE_HORIZON_TTL_SECONDS instead of reading it per request.
+    """
+    cached = archive_horizons.get(collection)
+    if cached is not None and cached[0] > time.monotonic() and not refresh:
+        return cached[1]
+    state = await db.migrations.find_one({"_id": f"archive:{collection}"}, {"_id": 0, "horizon": 1})
+    horizon = parse_timestamp((state or {}).get("horizon"))
+    archive_horizons[collection] = (time.monotonic() + ARCHIVE_HORIZON_TTL_SECONDS, horizon)
+    return horizon
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+# Every field migrate_datetimes converts; until it has run, rows may hold either type
+TIMESTAMP_FIELDS = {field for fields in DATETIME_FIELDS.values() for field in fields}
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if user is None:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid authentication")
+def sort_value(doc: dict, field: str):
+    value = doc.get(field)
+    if field in TIMESTAMP_FIELDS and isinstance(value, str):
+        # A legacy ISO string compares as the UTC date it names (missing if unparseable)
+        return parse_timestamp(value)
+    return value
+
+def sort_key(sort: list):
+    # Mongo orders missing values first; (present, value) does the same in Python
+    def key(doc):
+        values = (sort_value(doc, field) for field, _ in sort)
+        return tuple((value is not None, value) for value in values)
+    return key
+
+async def stream_page(collection: str, query: dict, sort: list, limit: int, size: int = STREAM_BATCH_SIZE):
+    """Yield one page of `collection` in `sort` order as batches, reading the archive only when the page reaches it.
+
+    Both tiers run the same query and are merged as their cursors deliver,
+    so at most one batch is held at a time. Archived rows all predate the
+    archive horizon, so a newest-first page only opens the archive cursor
+    once the hot rows cross the horizon. `sort` must use a single direction
+    throughout; a row caught mid-move is returned once, from the hot tier.
+    """
+    hot = aiter(db[collection].find(query, {"_id": 0}).sort(sort).limit(limit).batch_size(size))
+    horizon = await archive_horizon(collection)
+    if horizon is None:
+        async for batch in cursor_batches(hot, size):
+            yield batch
+        return
+    
+    key = sort_key(sort)
+    descending = sort[0][1] == DESCENDING
+    newest_first = sort[0] == ("created_at", DESCENDING)
+    
+    def reaches_archive(row) -> bool:
+        # Archived rows can only sort ahead of a hot row older than the horizon
+        if row is None or not newest_first:
+            return True
+        created_at = parse_timestamp(row.get("created_at"))
+        return created_at is None or created_at < horizon
+    
+    cold = cold_row = None
+    hot_row = await anext(hot, None)
+    batch, sent, seen = [], 0, set()
+    while sent < limit:
+        if cold is None and reaches_archive(hot_row):
+            cold = aiter(db[archive_of(collection)].find(query, {"_id": 0, "archived_at": 0}).sort(sort).limit(limit).batch_size(size))
+            cold_row = await anext(cold, None)
+        if hot_row is None and cold_row is None:
+            break
+        # Ties go to the hot row, so a duplicate's archive copy always comes second
+        if cold_row is None or (hot_row is not None and (key(hot_row) >= key(cold_row) if descending else key(hot_row) <= key(cold_row))):
+            row, hot_row = hot_row, await anext(hot, None)
+        else:
+            row, cold_row = cold_row, await anext(cold, None)
+        if row["id"] in seen:
+            continue
+        seen.add(row["id"])
+        batch.append(row)
+        sent += 1
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def find_page(collection: str, query: dict, sort: list, limit: int) -> list:
+    """One page of `collection` as a list; see stream_page."""
+    return [row async for batch in stream_page(collection, query, sort, limit) for row in batch]
+
+async def count_archived_sessions(sessions: list, sign: int = 1):
+    """Add (or with sign=-1, take back) archived sessions in the per-status tallies."""
+    tallies = {}
+    for session in sessions:
+        status = session.get("status") or "pending"
+        for counter_id in (
+            ARCHIVED_SESSIONS_COUNTER_ID,
+            archived_sessions_counter_id("student_id", session["student_id"]),
+            archived_sessions_counter_id("mentor_id", session["mentor_id"]),
+        ):
+            increments = tallies.setdefault(counter_id, {})
+            increments[status] = increments.get(status, 0) + sign
+    if tallies:
+        await db.counters.bulk_write(
+            [UpdateOne({"_id": counter_id}, {"$inc": increments}, upsert=True) for counter_id, increments in tallies.items()],
+            ordered=False,
+        )
+
+async def rebuild_archived_session_counts():
+    """Recompute the archived-session tallies from sessions_archive, e.g. after an interrupted run."""
+    to_counters = [
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": [{"_id": "$_id"}, {"$arrayToObject": "$counts"}]}}},
+        {"$merge": {"into": "counters", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    by_status = {"$ifNull": ["$status", "pending"]}
+    pipelines = [[
+        {"$group": {"_id": by_status, "count": {"$sum": 1}}},
+        {"$group": {"_id": ARCHIVED_SESSIONS_COUNTER_ID, "counts": {"$push": {"k": "$_id", "v": "$count"}}}},
+        *to_counters,
+    ]]
+    for owner_field in ("student_id", "mentor_id"):
+        pipelines.append([
+            {"$group": {"_id": {"owner": f"${owner_field}", "status": by_status}, "count": {"$sum": 1}}},
+            {"$group": {
+                "_id": {"$concat": [f"{ARCHIVED_SESSIONS_COUNTER_ID}:{owner_field}:", "$_id.owner"]},
+                "counts": {"$push": {"k": "$_id.status", "v": "$count"}},
+            }},
+            *to_counters,
+        ])
+    for pipeline in pipelines:
+        await db.sessions_archive.aggregate(pipeline).to_list(None)
+
+async def archive_collection(collection: str, batch_size: int = 1000, progress=None,
+                             settle_seconds: float = ARCHIVE_HORIZON_TTL_SECONDS) -> int:
+    """Move rows past their hot window into `<collection>_archive`, one batch at a time.
+
+    The horizon is published before anything moves, and the run waits
+    `settle_seconds` so every API process's cached copy has expired before
+    a page can reach the archive. Each batch is upserted into the archive by
+    _id and then deleted from the hot collection under the same filter, so
+    an interrupted run simply picks up where it stopped. A row that changed
+    in between (a cancelled session revived) stays hot and its archive copy
+    is dropped. Returns rows moved.
+    """
+    hot_days, eligible = ARCHIVE_POLICIES[collection]
+    horizon = utc_now() - timedelta(days=hot_days)
+    await db.migrations.update_one(
+        {"_id": f"archive:{collection}"},
+        {"$max": {"horizon": horizon}, "$set": {"updated_at": utc_now()}},
+        upsert=True
+    )
+    await archive_horizon(collection, refresh=True)
+    if settle_seconds > 0:
+        await asyncio.sleep(settle_seconds)
+    
+    archive = db[archive_of(collection)]
+    query = {**eligible, "created_at": {"$lt": horizon}}
+    moved = 0
+    while True:
+        batch = await db[collection].find(query).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+        ids = [doc["_id"] for doc in batch]
+        archived_at = utc_now()
+        result = await archive.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, {**doc, "archived_at": archived_at}, upsert=True) for doc in batch],
+            ordered=False
+        )
+        if collection == "sessions":
+            # Only rows new to the archive, so re-running a batch never counts twice
+            await count_archived_sessions([batch[index] for index in result.upserted_ids])
+        
+        deleted = await db[collection].delete_many({"_id": {"$in": ids}, **query})
+        if deleted.deleted_count < len(ids):
+            still_hot = {doc["_id"] async for doc in db[collection].find({"_id": {"$in": ids}}, {"_id": 1})}
+            await archive.delete_many({"_id": {"$in": list(still_hot)}})
+            if collection == "sessions":
+                await count_archived_sessions([doc for doc in batch if doc["_id"] in still_hot], sign=-1)
+        moved += deleted.deleted_count
+        if progress is not None:
+            progress(collection, moved)
+    return moved
 
 
 # --- Seed Data ---
-async def seed_sample_data():
-    # Check if data already exists
+async def seed_sample_data() -> bool:
+    """Insert the demo accounts into an empty database; returns whether users were added."""
     existing_users = await db.users.count_documents({})
     if existing_users > 0:
-        return
+        return False
     
     # Sample students
     students = [
@@ -198,20 +2384,6 @@ async def seed_sample_data():
         {"name": "Rajesh", "email": "rajesh@gmail.com", "college": "Anna University"},
     ]
     
-    for student in students:
-        user = User(
-            email=student["email"],
-            name=student["name"],
-            password_hash=get_password_hash(student["name"].lower()),
-            role="student",
-            college=student["college"],
-            skills=["Python", "JavaScript"],
-            bio="Eager to learn and grow in my career."
-        )
-        doc = user.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.users.insert_one(doc)
-    
     # Sample mentors
     mentors = [
         {
@@ -306,11 +2478,30 @@ async def seed_sample_data():
         },
     ]
     
-    for mentor in mentors:
-        user = User(
+    student_hashes, mentor_hashes, (admin_hash,) = await asyncio.gather(
+        password_hasher.hash_many(student["name"].lower() for student in students),
+        password_hasher.hash_many(mentor["name"].split()[0].lower() for mentor in mentors),
+        password_hasher.hash_many(["admin123"]),
+    )
+    
+    users = [
+        User(
+            email=student["email"],
+            name=student["name"],
+            password_hash=password_hash,
+            role="student",
+            college=student["college"],
+            skills=["Python", "JavaScript"],
+            bio="Eager to learn and grow in my career."
+        )
+        for student, password_hash in zip(students, student_hashes)
+    ]
+    
+    users.extend(
+        User(
             email=mentor["email"],
             name=mentor["name"],
-            password_hash=get_password_hash(mentor["name"].split()[0].lower()),
+            password_hash=password_hash,
             role="mentor",
             college=mentor["college"],
             years_experience=mentor["years_experience"],
@@ -319,23 +2510,125 @@ async def seed_sample_data():
             rating=mentor["rating"],
             photo=f"https://ui-avatars.com/api/?name={mentor['name'].replace(' ', '+')}&size=200&background=2C3EAA&color=fff"
         )
-        doc = user.model_dump()
-        doc['created_at'] = doc['created_at'].isoformat()
-        await db.users.insert_one(doc)
+        for mentor, password_hash in zip(mentors, mentor_hashes)
+    )
     
     # Create admin user
-    admin = User(
+    users.append(User(
         email="admin@mentorbridge.com",
         name="Admin",
-        password_hash=get_password_hash("admin123"),
+        password_hash=admin_hash,
         role="admin",
         bio="Platform administrator"
-    )
-    doc = admin.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.users.insert_one(doc)
+    ))
+    
+    docs = [user.model_dump() for user in users]
+    try:
+        await db.users.insert_many(docs, ordered=False)
+    except BulkWriteError:
+        # Another worker seeded concurrently; the unique email index kept one copy
+        logger.info("Sample data already seeded by another worker")
+        return True
     
     logger.info("Sample data seeded successfully")
+    return True
+
+FIXTURE_SLOT_DAYS = 366
+FIXTURE_SLOT_HOURS = range(9, 21)
+FIXTURE_SLOTS_PER_MENTOR = FIXTURE_SLOT_DAYS * len(FIXTURE_SLOT_HOURS)
+
+async def seed_fixture_data(students: int, mentors: int, sessions: int, batch_size: int = 10000, seed: int = 42):
+    """Generate a large, deterministic data set for load testing.
+
+    Every generated account shares the password "loadtest", hashed once.
+    Documents are written in unordered insert_many batches so memory stays
+    bounded by `batch_size`. Sessions occupy distinct hourly slots in the
+    past year, so there can be at most FIXTURE_SLOTS_PER_MENTOR per mentor.
+    """
+    if sessions and (not students or sessions > mentors * FIXTURE_SLOTS_PER_MENTOR):
+        raise ValueError(
+            f"{sessions} sessions need at least one student and {FIXTURE_SLOTS_PER_MENTOR} slots per mentor; "
+            f"{mentors} mentors offer {mentors * FIXTURE_SLOTS_PER_MENTOR}"
+        )
+    rng = random.Random(seed)
+    password_hash = await get_password_hash("loadtest")
+
+    def next_id():
+        # Drawn from rng rather than uuid4 so the same seed yields the same ids
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    colleges = ["IIT Hyderabad", "NIT Warangal", "SRM University", "VIT Chennai", "PES University",
+                "JNTU Hyderabad", "Osmania University", "Amrita University", "Christ University", "Anna University"]
+    topics = ["AI", "ML", "Data Science", "Cloud", "Software Engineering", "Cybersecurity", "Full Stack Dev",
+              "Web Technologies", "Databases", "Embedded Systems", "Project Management", "Marketing", "Strategy"]
+    statuses = ["pending", "confirmed", "completed", "cancelled"]
+    
+    async def insert_batches(collection, make_doc, count):
+        for start in range(0, count, batch_size):
+            docs = [make_doc(i) for i in range(start, min(start + batch_size, count))]
+            await collection.insert_many(docs, ordered=False)
+    
+    student_ids, mentor_ids = [], []
+    
+    def make_student(i):
+        doc = User.model_construct(
+            id=next_id(),
+            email=f"student{i}@loadtest.mentorbridge.com",
+            name=f"Student {i}",
+            password_hash=password_hash,
+            role="student",
+            college=rng.choice(colleges),
+            skills=rng.sample(topics, 2),
+            bio="Load test student."
+        ).model_dump()
+        student_ids.append(doc["id"])
+        return doc
+    
+    def make_mentor(i):
+        doc = User.model_construct(
+            id=next_id(),
+            email=f"mentor{i}@loadtest.mentorbridge.com",
+            name=f"Mentor {i}",
+            password_hash=password_hash,
+            role="mentor",
+            college=rng.choice(colleges),
+            years_experience=rng.randint(1, 25),
+            expertise=rng.sample(topics, rng.randint(1, 3)),
+            bio="Load test mentor.",
+            rating=round(rng.uniform(3.5, 5.0), 1)
+        ).model_dump()
+        mentor_ids.append(doc["id"])
+        return doc
+    
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    # Distinct (mentor, day, hour) slots drawn up front, so (mentor_id, start) stays unique without redraws
+    slots = rng.sample(range(mentors * FIXTURE_SLOTS_PER_MENTOR), sessions)
+    
+    def make_session(i):
+        mentor_index, slot = divmod(slots[i], FIXTURE_SLOTS_PER_MENTOR)
+        days_ago, hour = divmod(slot, len(FIXTURE_SLOT_HOURS))
+        mentor_id = mentor_ids[mentor_index]
+        start = midnight - timedelta(days=days_ago) + timedelta(hours=FIXTURE_SLOT_HOURS[hour])
+        doc = Session.model_construct(
+            id=next_id(),
+            student_id=rng.choice(student_ids),
+            mentor_id=mentor_id,
+            date=start.date().isoformat(),
+            time=start.strftime("%H:%M"),
+            status=rng.choice(statuses),
+            start=start
+        ).model_dump()
+        if doc["status"] in OPEN_SESSION_STATUSES:
+            doc["slot_held"] = True
+        return doc
+    
+    await insert_batches(db.users, make_student, students)
+    await insert_batches(db.users, make_mentor, mentors)
+    await insert_batches(db.sessions, make_session, sessions)
+    
+    if MATERIALIZED_COUNTERS:
+        await rebuild_platform_counters()
+    logger.info("Fixture data seeded: %d students, %d mentors, %d sessions", students, mentors, sessions)
 
 
 # --- Routes ---
@@ -346,22 +2639,31 @@ async def root():
 # Auth routes
 @api_router.post("/auth/register")
 async def register(user_data: UserCreate):
+    if user_data.role not in SELF_REGISTER_ROLES:
+        raise HTTPException(status_code=400, detail="Invalid role")
+    
     # Check if user exists
-    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 0})
+    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = User(
         email=user_data.email,
         name=user_data.name,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash(user_data.password),
         role=user_data.role,
         college=user_data.college
     )
     
     doc = user.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.users.insert_one(doc)
+    try:
+        await db.users.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await bump_platform_counters({f"users.{user.role}": 1})
+    if user.role == "mentor":
+        mentor_index.upsert(doc)
+        mentor_matcher.upsert(doc)
     
     token = create_access_token({"sub": user.id})
     
@@ -373,9 +2675,18 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login")
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password_hash"]):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    
+    valid, new_hash = await verify_password(credentials.password, user["password_hash"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    # Transparently upgrade hashes made with a different cost factor
+    if new_hash:
+        await db.users.update_one({"id": user["id"]}, {"$set": {"password_hash": new_hash}})
+        user_cache.invalidate(user["id"])
+    
     token = create_access_token({"sub": user["id"]})
     
     return {
@@ -388,42 +2699,191 @@ async def get_me(current_user: dict = Depends(get_current_user)):
     return UserResponse(**current_user)
 
 # User routes
+@api_router.get("/users")
+async def get_users(ids: str = Query(..., description="Comma-separated user ids"),
+                    fields: Optional[str] = Query(None, description="Comma-separated fields to return")):
+    return json_response(await lookup_users(
+        [uid.strip() for uid in ids.split(",")],
+        [field.strip() for field in fields.split(",") if field.strip()] if fields else None,
+    ))
+
+@api_router.post("/users/lookup")
+async def post_users_lookup(lookup: UserLookup):
+    # Same as GET /users for id lists too long for a query string
+    return json_response(await lookup_users(lookup.ids, lookup.fields))
+
 @api_router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user(user_id: str):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
+async def get_user(user_id: str, request: Request):
+    # Served through the user cache, so a revalidation usually costs no Mongo read
+    user = await user_cache.get(user_id, load_user)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return UserResponse(**user)
+    
+    # The id keeps legacy users (all at version 0) from sharing a validator
+    etag = f'W/"{user["id"]}:{user.get("version", 0)}"'
+    last_modified = parse_timestamp(user.get("updated_at") or user.get("created_at"))
+    return conditional_response(
+        request, lambda: dumps(UserResponse(**user).model_dump()), etag, "private, no-cache", last_modified
+    )
 
 @api_router.put("/users/profile")
 async def update_profile(profile_data: ProfileUpdate, current_user: dict = Depends(get_current_user)):
     update_data = {k: v for k, v in profile_data.model_dump().items() if v is not None}
+    if update_data.get("photo", "").startswith("data:"):
+        raise HTTPException(status_code=400, detail="Upload photos with PUT /api/users/photo")
     
-    if update_data:
-        await db.users.update_one(
-            {"id": current_user["id"]},
-            {"$set": update_data}
-        )
-    
-    updated_user = await db.users.find_one({"id": current_user["id"]}, {"_id": 0})
+    updated_user = await update_user_fields(current_user, update_data) if update_data else current_user
     return UserResponse(**updated_user)
 
+@api_router.put("/users/photo")
+async def upload_photo(request: Request, current_user: dict = Depends(get_current_user)):
+    """Store the raw image in the request body as the caller's profile photo."""
+    try:
+        declared_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared_length > PHOTO_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Photos are limited to {PHOTO_MAX_BYTES} bytes")
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > PHOTO_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Photos are limited to {PHOTO_MAX_BYTES} bytes")
+    if not data:
+        raise HTTPException(status_code=400, detail="Request body must contain the image")
+    
+    photo_id, sizes = await store_photo(bytes(data))
+    url = photo_url(photo_id)
+    await update_user_fields(current_user, {"photo": url, "photo_id": photo_id})
+    return {"photo": url, "thumbnails": {str(size): photo_url(photo_id, size) for size in sizes}}
+
+@api_router.get("/photos/{photo_id}")
+async def get_photo(request: Request, photo_id: str, size: Optional[int] = None):
+    if not PHOTO_ID_PATTERN.fullmatch(photo_id):
+        raise HTTPException(status_code=404, detail="Photo not found")
+    if size is not None and size not in PHOTO_THUMBNAIL_SIZES:
+        raise HTTPException(status_code=400, detail=f"size must be one of {', '.join(map(str, PHOTO_THUMBNAIL_SIZES))}")
+    
+    # Keys are content hashes, so a given URL never changes and can be cached forever
+    key = photo_key(photo_id, size)
+    headers = {"ETag": f'"{key}"', "Cache-Control": PHOTO_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if is_not_modified(request, headers["ETag"], None):
+        return Response(status_code=304, headers=headers)
+    
+    data = await photo_store.get(key)
+    if data is None and size is not None:
+        # Uploaded while thumbnails were unavailable; the original still renders
+        data = await photo_store.get(photo_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    media_type = sniff_image_type(data) or "application/octet-stream"
+    
+    byte_range = parse_byte_range(request.headers.get("range"), len(data))
+    if byte_range is None:
+        return Response(data, media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+    return Response(data[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+@api_router.put("/users/availability")
+async def update_availability(availability: AvailabilityUpdate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "mentor":
+        raise HTTPException(status_code=403, detail="Only mentors can publish availability")
+    # Windows on the same day may not overlap, so no two offered slots ever intersect
+    windows = sorted(availability.windows, key=lambda w: (w.weekday, clock_minutes(w.start)))
+    for i, window in enumerate(windows):
+        if clock_minutes(window.end) - clock_minutes(window.start) < SESSION_SLOT_MINUTES:
+            raise HTTPException(status_code=400, detail=f"Windows must be at least {SESSION_SLOT_MINUTES} minutes long")
+        if i and windows[i - 1].weekday == window.weekday and clock_minutes(windows[i - 1].end) > clock_minutes(window.start):
+            raise HTTPException(status_code=400, detail="Availability windows overlap")
+    
+    windows = [window.model_dump() for window in windows]
+    await db.users.update_one(
+        {"id": current_user["id"]},
+        {
+            "$set": {"availability": windows, "updated_at": utc_now()},
+            "$inc": {"version": 1},
+        }
+    )
+    user_cache.invalidate(current_user["id"])
+    return {"availability": windows, "slot_minutes": SESSION_SLOT_MINUTES}
+
 # Mentor routes
 @api_router.get("/mentors", response_model=List[UserResponse])
-async def get_mentors(search: Optional[str] = None, expertise: Optional[str] = None):
-    query = {"role": "mentor"}
+async def get_mentors(
+    request: Request,
+    search: Optional[str] = None,
+    expertise: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    # Without a limit this stays the whole directory, as clients written before paging expect
+    if limit is None:
+        limit = MENTOR_DIRECTORY_MAX_ITEMS
+    if search or expertise:
+        body = dumps(mentor_index.search(search, expertise, limit, offset)["items"])
+        etag = make_etag(body)
+    else:
+        body, etag = directory_page(limit, offset)
+    return conditional_response(
+        request, lambda: body, etag, f"private, max-age={MENTOR_DIRECTORY_MAX_AGE}", mentor_index.last_modified
+    )
+
+@api_router.get("/mentors/search")
+async def search_mentors(
+    q: Optional[str] = None,
+    expertise: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0)
+):
+    return json_response(mentor_index.search(q, expertise, limit, offset))
+
+@api_router.get("/mentors/{mentor_id}/slots")
+async def get_mentor_slots(
+    mentor_id: str,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    mentor = await user_cache.get(mentor_id, load_user)
+    if not mentor or mentor["role"] != "mentor":
+        raise HTTPException(status_code=404, detail="Mentor not found")
     
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"expertise": {"$regex": search, "$options": "i"}}
-        ]
+    now = datetime.now(timezone.utc)
+    first_day = date_from or now.date()
+    last_day = date_to or first_day + timedelta(days=13)
+    if last_day < first_day or (last_day - first_day).days >= MAX_SLOT_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must span 1 to {MAX_SLOT_RANGE_DAYS} days")
     
-    if expertise:
-        query["expertise"] = {"$regex": expertise, "$options": "i"}
+    availability = mentor_availability(mentor)
+    starts = [start for start in availability_slots(availability, first_day, last_day) if start > now]
+    booked = set()
+    if starts:
+        booked = await booked_slot_starts(mentor_id, starts[0], starts[-1] + timedelta(minutes=1))
     
-    mentors = await db.users.find(query, {"_id": 0}).to_list(1000)
-    return [UserResponse(**mentor) for mentor in mentors]
+    duration = timedelta(minutes=SESSION_SLOT_MINUTES)
+    return json_response({
+        "mentor_id": mentor_id,
+        "slot_minutes": SESSION_SLOT_MINUTES,
+        "availability": availability,
+        "slots": [
+            {"start": start.isoformat(), "end": (start + duration).isoformat()}
+            for start in starts if start not in booked
+        ],
+    })
+
+@api_router.get("/mentors/recommendations")
+async def recommend_mentors(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    tags = MentorMatcher.tags_of(current_user)
+    items = []
+    # Ask for one extra so a mentor looking at their own list still gets `limit` others
+    for mentor_id, score, matched in mentor_matcher.recommend(tags, limit + 1):
+        mentor = mentor_index.get(mentor_id)
+        if mentor is not None and mentor_id != current_user["id"]:
+            items.append({**mentor, "score": round(score, 4), "matched_tags": matched})
+    return json_response({"tags": sorted(tags), "items": items[:limit]})
 
 # Session routes
 @api_router.post("/sessions")
@@ -431,55 +2891,212 @@ async def create_session(session_data: SessionCreate, current_user: dict = Depen
     if current_user["role"] != "student":
         raise HTTPException(status_code=403, detail="Only students can book sessions")
     
+    mentor = await user_cache.get(session_data.mentor_id, load_user)
+    if not mentor or mentor["role"] != "mentor":
+        raise HTTPException(status_code=404, detail="Mentor not found")
+    
+    start = parse_slot_start(session_data.date, session_data.time)
+    if start <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Cannot book a slot in the past")
+    if not slot_offered(mentor_availability(mentor), start):
+        raise HTTPException(status_code=400, detail="Mentor is not available at this time")
+    
     session = Session(
         student_id=current_user["id"],
         mentor_id=session_data.mentor_id,
-        date=session_data.date,
-        time=session_data.time,
+        date=start.date().isoformat(),
+        time=start.strftime("%H:%M"),
         status="pending",
-        notes=session_data.notes
+        notes=session_data.notes,
+        start=start
     )
     
     doc = session.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.sessions.insert_one(doc)
+    doc['slot_held'] = True
+    try:
+        await db.sessions.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="This slot is already booked")
+    await bump_platform_counters({"sessions.pending": 1})
+    mentor_matcher.adjust_load(session.mentor_id, 1)
     
     return session
 
 @api_router.get("/sessions")
 async def get_sessions(current_user: dict = Depends(get_current_user)):
     if current_user["role"] == "student":
-        sessions = await db.sessions.find({"student_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+        query = {"student_id": current_user["id"]}
     elif current_user["role"] == "mentor":
-        sessions = await db.sessions.find({"mentor_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+        query = {"mentor_id": current_user["id"]}
     else:
-        sessions = await db.sessions.find({}, {"_id": 0}).to_list(1000)
+        query = {}
     
-    # Enrich with user data
-    for session in sessions:
-        student = await db.users.find_one({"id": session["student_id"]}, {"_id": 0, "name": 1, "email": 1})
-        mentor = await db.users.find_one({"id": session["mentor_id"]}, {"_id": 0, "name": 1, "email": 1})
-        session["student_name"] = student["name"] if student else "Unknown"
-        session["mentor_name"] = mentor["name"] if mentor else "Unknown"
+    # Newest first; admins get the full listing under /admin/sessions
+    sessions = stream_page("sessions", query, [("created_at", DESCENDING), ("id", DESCENDING)], 1000)
     
-    return sessions
+    # Enrich with user data one batch at a time while streaming
+    async def enrich(batch):
+        await attach_user_names(batch, {"student_id": "student_name", "mentor_id": "mentor_name"})
+    
+    return stream_json_array(sessions, enrich)
 
 @api_router.put("/sessions/{session_id}/status")
 async def update_session_status(session_id: str, status: str, current_user: dict = Depends(get_current_user)):
+    if status not in SESSION_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    
     session = await db.sessions.find_one({"id": session_id}, {"_id": 0})
     if not session:
+        if await db.sessions_archive.find_one({"id": session_id}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="Archived sessions can no longer be changed")
         raise HTTPException(status_code=404, detail="Session not found")
     
     if current_user["role"] == "mentor" and session["mentor_id"] != current_user["id"]:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    await db.sessions.update_one(
-        {"id": session_id},
-        {"$set": {"status": status}}
-    )
+    update = {"$set": {"status": status}}
+    if session.get("start"):
+        # Cancelling frees the slot; reviving a cancelled session has to win it back
+        if status == "cancelled":
+            update["$unset"] = {"slot_held": ""}
+        else:
+            update["$set"]["slot_held"] = True
+    
+    # Read the status we replaced atomically so concurrent changes keep the counters exact
+    try:
+        previous = await db.sessions.find_one_and_update(
+            {"id": session_id},
+            update,
+            projection={"_id": 0, "status": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="This slot has since been booked by another session")
+    previous_status = (previous or {}).get("status", "pending")
+    if previous is not None and previous_status != status:
+        await bump_platform_counters({f"sessions.{previous_status}": -1, f"sessions.{status}": 1})
+        opened = (status in OPEN_SESSION_STATUSES) - (previous_status in OPEN_SESSION_STATUSES)
+        if opened:
+            mentor_matcher.adjust_load(session["mentor_id"], opened)
     
     return {"message": "Session status updated"}
 
+# Admin session routes
+SESSION_SORT_FIELDS = ("created_at", "date")
+SESSION_EXPORT_FIELDS = (
+    "id", "created_at", "date", "time", "status",
+    "student_id", "student_name", "mentor_id", "mentor_name", "notes",
+)
+
+def session_filters(
+    status: Optional[str] = None,
+    mentor_id: Optional[str] = None,
+    student_id: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+) -> dict:
+    """Mongo filter for the admin session listing and export.
+
+    created_from/created_to bound the booking time (upper bound exclusive);
+    date_from/date_to bound the scheduled date (both inclusive).
+    """
+    if status is not None and status not in SESSION_STATUSES:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    query = {}
+    if status:
+        query["status"] = status
+    if mentor_id:
+        query["mentor_id"] = mentor_id
+    if student_id:
+        query["student_id"] = student_id
+    
+    created = {}
+    if created_from:
+        created["$gte"] = parse_timestamp(created_from)
+    if created_to:
+        created["$lt"] = parse_timestamp(created_to)
+    if created:
+        query["created_at"] = created
+    
+    scheduled = {}
+    if date_from:
+        scheduled["$gte"] = date_from.isoformat()
+    if date_to:
+        scheduled["$lte"] = date_to.isoformat()
+    if scheduled:
+        query["date"] = scheduled
+    return query
+
+@api_router.get("/admin/sessions")
+async def list_admin_sessions(
+    filters: dict = Depends(session_filters),
+    sort: str = Query("created_at", pattern="^(created_at|date)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_admin_user)
+):
+    direction = DESCENDING if order == "desc" else ASCENDING
+    query = dict(filters)
+    if cursor:
+        sort_value, session_id = decode_cursor(cursor, 2)
+        keyset = keyset_before if direction == DESCENDING else keyset_after
+        query.update(keyset(sort, sort_value, "id", session_id))
+    
+    sessions = await find_page("sessions", query, [(sort, direction), ("id", direction)], limit)
+    await attach_user_names(sessions, {"student_id": "student_name", "mentor_id": "mentor_name"})
+    
+    next_cursor = None
+    if len(sessions) == limit:
+        last = sessions[-1]
+        next_cursor = encode_cursor(last.get(sort), last["id"])
+    
+    return json_response({"items": sessions, "next_cursor": next_cursor})
+
+def encode_ndjson(batch: list) -> bytes:
+    return b"".join(dumps(doc) + b"\n" for doc in batch)
+
+def encode_csv(batch: list, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=SESSION_EXPORT_FIELDS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    writer.writerows(
+        {key: json_default(value) if isinstance(value, datetime) else value for key, value in doc.items()}
+        for doc in batch
+    )
+    return buffer.getvalue().encode()
+
+@api_router.get("/admin/sessions/export")
+async def export_admin_sessions(
+    filters: dict = Depends(session_filters),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: dict = Depends(get_admin_user)
+):
+    # Oldest first, so rows booked while the export runs land at the end rather than shifting it.
+    # The archive holds the oldest finished sessions, so it goes out first.
+    cursors = [
+        db[collection].find(filters, {"_id": 0, "archived_at": 0}).sort(
+            [("created_at", ASCENDING), ("id", ASCENDING)]
+        ).batch_size(STREAM_BATCH_SIZE)
+        for collection in (archive_of("sessions"), "sessions")
+    ]
+    
+    async def body():
+        if export_format == "csv":
+            yield encode_csv([], header=True)
+        for cursor in cursors:
+            async for batch in cursor_batches(cursor):
+                await attach_user_names(batch, {"student_id": "student_name", "mentor_id": "mentor_name"})
+                yield encode_csv(batch) if export_format == "csv" else encode_ndjson(batch)
+    
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(body(), media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="sessions.{export_format}"',
+    })
+
 # Message routes
 @api_router.post("/messages")
 async def send_message(message_data: MessageCreate, current_user: dict = Depends(get_current_user)):
@@ -490,26 +3107,201 @@ async def send_message(message_data: MessageCreate, current_user: dict = Depends
     )
     
     doc = message.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.messages.insert_one(doc)
+    doc['conversation_id'] = conversation_id_for(message.from_user_id, message.to_user_id)
+    await message_writes.insert(doc)
+    await record_conversation_message(doc)
+    
+    doc.pop("_id", None)
+    recipient = await user_cache.get(message.to_user_id, load_user)
+    doc["from_user_name"] = current_user["name"]
+    doc["to_user_name"] = recipient["name"] if recipient else "Unknown"
+    await message_hub.publish_message(doc)
     
     return message
 
 @api_router.get("/messages")
 async def get_messages(current_user: dict = Depends(get_current_user)):
-    messages = await db.messages.find(
+    # created_at alone lets the $or merge the two per-side indexes without an in-memory sort
+    messages = stream_page(
+        "messages",
         {"$or": [{"from_user_id": current_user["id"]}, {"to_user_id": current_user["id"]}]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(1000)
+        [("created_at", DESCENDING)],
+        1000
+    )
+    
+    # Enrich with user data one batch at a time while streaming
+    async def enrich(batch):
+        await attach_user_names(batch, {"from_user_id": "from_user_name", "to_user_id": "to_user_name"})
+    
+    return stream_json_array(messages, enrich)
+
+@api_router.post("/messages/stream-ticket")
+async def create_message_stream_ticket(current_user: dict = Depends(get_current_user)):
+    return {"ticket": create_stream_ticket(current_user["id"]), "expires_in": STREAM_TICKET_TTL_SECONDS}
+
+@api_router.get("/messages/stream")
+async def stream_messages(
+    request: Request,
+    ticket: Optional[str] = None,
+    cursor: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Server-sent events for new messages to or from the current user.
+
+    EventSource cannot set headers, so browsers pass `?ticket=` from POST
+    /messages/stream-ticket rather than their access token, which would
+    end up in access logs. Each event id is a (created_at, id) cursor;
+    on reconnect the browser sends it back as Last-Event-ID (or `?cursor=`
+    with a fresh ticket) and anything missed is replayed from the database
+    before live delivery resumes.
+    """
+    if credentials is not None:
+        user = await user_from_token(credentials.credentials)
+    elif ticket:
+        user = await user_from_token(ticket, scope=STREAM_TICKET_SCOPE)
+    else:
+        raise HTTPException(status_code=401, detail="Invalid authentication")
+    user_id = user["id"]
+    
+    cursor = request.headers.get("last-event-id") or cursor
+    after = decode_cursor(cursor, 2) if cursor else None
+    
+    async def events():
+        # Subscribe before reading the backlog so nothing slips between the two
+        queue = message_hub.subscribe(user_id)
+        try:
+            replayed = set()
+            if after is not None:
+                created_at, message_id = after
+                backlog = await db.messages.find(
+                    {"$and": [
+                        {"$or": [{"from_user_id": user_id}, {"to_user_id": user_id}]},
+                        {"$or": [
+                            {"created_at": {"$gt": created_at}},
+                            {"created_at": created_at, "id": {"$gt": message_id}},
+                        ]},
+                    ]},
+                    {"_id": 0}
+                ).sort([("created_at", ASCENDING), ("id", ASCENDING)]).limit(MAX_PAGE_SIZE + 1).to_list(MAX_PAGE_SIZE + 1)
+                if len(backlog) > MAX_PAGE_SIZE:
+                    # Too far behind to replay; the client should reload via the REST API.
+                    # The empty id clears Last-Event-ID so the reconnect starts live.
+                    yield format_sse("resync", {}, "")
+                    return
+                await attach_user_names(backlog, {"from_user_id": "from_user_name", "to_user_id": "to_user_name"})
+                for message in backlog:
+                    replayed.add(message["id"])
+                    yield format_sse("message", message, encode_cursor(message["created_at"], message["id"]))
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), MESSAGE_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is MessageHub.RESYNC:
+                    yield format_sse("resync", {}, "")
+                    return
+                if event["id"] in replayed:
+                    continue
+                yield format_sse("message", event, encode_cursor(event["created_at"], event["id"]))
+        finally:
+            message_hub.unsubscribe(user_id, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/messages/unread-count")
+async def get_unread_count(by_conversation: bool = False, current_user: dict = Depends(get_current_user)):
+    # One primary-key read, cheap enough for the nav bar to poll
+    counter = await db.counters.find_one({"_id": unread_counter_id(current_user["id"])}, {"_id": 0, "total": 1})
+    result = {"total": max(0, (counter or {}).get("total", 0))}
+    if by_conversation:
+        rows = await db.conversations.find(
+            {"user_id": current_user["id"], "unread_count": {"$gt": 0}},
+            {"_id": 0, "counterpart_id": 1, "unread_count": 1}
+        ).to_list(None)
+        result["conversations"] = {row["counterpart_id"]: row["unread_count"] for row in rows}
+    return result
+
+@api_router.post("/messages/read")
+async def mark_messages_read(data: MarkRead, current_user: dict = Depends(get_current_user)):
+    if data.user_id == current_user["id"]:
+        return {"marked": 0}
+    
+    query = {
+        "conversation_id": conversation_id_for(current_user["id"], data.user_id),
+        "to_user_id": current_user["id"],
+        "read": False,
+    }
+    if data.up_to:
+        created_at, message_id = decode_cursor(data.up_to, 2)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lte": message_id}},
+        ]
+    result = await db.messages.update_many(query, {"$set": {"read": True}})
+    
+    # Only messages this call flipped are subtracted, so concurrent mark-reads never double count
+    marked = result.modified_count
+    if marked:
+        await asyncio.gather(
+            db.conversations.update_one(
+                {"user_id": current_user["id"], "counterpart_id": data.user_id},
+                {"$inc": {"unread_count": -marked}}
+            ),
+            db.counters.update_one({"_id": unread_counter_id(current_user["id"])}, {"$inc": {"total": -marked}}),
+        )
+    return {"marked": marked}
+
+@api_router.get("/messages/conversations")
+async def get_conversations(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    query = {"user_id": current_user["id"]}
+    if cursor:
+        last_message_at, counterpart_id = decode_cursor(cursor, 2)
+        query.update(keyset_before("last_message_at", last_message_at, "counterpart_id", counterpart_id))
+    
+    conversations = await db.conversations.find(query, {"_id": 0, "user_id": 0}).sort(
+        [("last_message_at", DESCENDING), ("counterpart_id", DESCENDING)]
+    ).limit(limit).to_list(limit)
+    await attach_user_names(conversations, {"counterpart_id": "counterpart_name"})
+    
+    next_cursor = None
+    if len(conversations) == limit:
+        last = conversations[-1]
+        next_cursor = encode_cursor(last["last_message_at"], last["counterpart_id"])
+    
+    return json_response({"items": conversations, "next_cursor": next_cursor})
+
+@api_router.get("/messages/conversations/{user_id}")
+async def get_conversation_messages(
+    user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    query = {"conversation_id": conversation_id_for(current_user["id"], user_id)}
+    if cursor:
+        created_at, message_id = decode_cursor(cursor, 2)
+        query.update(keyset_before("created_at", created_at, "id", message_id))
+    
+    messages = await find_page("messages", query, [("created_at", DESCENDING), ("id", DESCENDING)], limit)
     
-    # Enrich with user data
-    for message in messages:
-        from_user = await db.users.find_one({"id": message["from_user_id"]}, {"_id": 0, "name": 1})
-        to_user = await db.users.find_one({"id": message["to_user_id"]}, {"_id": 0, "name": 1})
-        message["from_user_name"] = from_user["name"] if from_user else "Unknown"
-        message["to_user_name"] = to_user["name"] if to_user else "Unknown"
+    next_cursor = None
+    if len(messages) == limit:
+        last = messages[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    # Pass to POST /messages/read to mark everything up to this page's newest message
+    read_cursor = encode_cursor(messages[0]["created_at"], messages[0]["id"]) if messages else None
     
-    return messages
+    return json_response({"items": messages, "next_cursor": next_cursor, "read_cursor": read_cursor})
 
 # Feedback routes
 @api_router.post("/feedback")
@@ -523,97 +3315,281 @@ async def submit_feedback(feedback_data: FeedbackCreate, current_user: dict = De
     )
     
     doc = feedback.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.feedback.insert_one(doc)
+    await feedback_writes.insert(doc)
     
-    # Update mentor rating
-    all_feedback = await db.feedback.find({"to_user_id": feedback_data.to_user_id}, {"_id": 0}).to_list(1000)
-    avg_rating = sum(f["rating"] for f in all_feedback) / len(all_feedback)
-    await db.users.update_one(
-        {"id": feedback_data.to_user_id},
-        {"$set": {"rating": round(avg_rating, 1)}}
-    )
+    # Update mentor rating; without it the stored feedback would drift from the aggregates
+    try:
+        rated = await apply_rating(feedback_data.to_user_id, feedback_data.rating)
+    except Exception:
+        await db.feedback.delete_one({"id": doc["id"]})
+        raise
+    user_cache.invalidate(feedback_data.to_user_id)
+    if rated is not None:
+        mentor_index.update_fields(feedback_data.to_user_id, rated)
+        mentor = mentor_index.get(feedback_data.to_user_id)
+        if mentor is not None:
+            mentor_matcher.upsert(mentor)
     
     return feedback
 
+async def load_user_feedback(user_id: str) -> bytes:
+    feedback = await db.feedback.find({"to_user_id": user_id}, {"_id": 0}).sort("created_at", DESCENDING).to_list(1000)
+    await attach_user_names(feedback, {"from_user_id": "from_user_name"})
+    return dumps(feedback)
+
 @api_router.get("/feedback/{user_id}")
 async def get_user_feedback(user_id: str):
-    feedback = await db.feedback.find({"to_user_id": user_id}, {"_id": 0}).to_list(1000)
-    
-    for fb in feedback:
-        from_user = await db.users.find_one({"id": fb["from_user_id"]}, {"_id": 0, "name": 1})
-        fb["from_user_name"] = from_user["name"] if from_user else "Unknown"
-    
-    return feedback
+    # Coalesced as encoded bytes, so every waiter gets an immutable copy
+    body = await singleflight.do("get_user_feedback", user_id, lambda: load_user_feedback(user_id))
+    return Response(body, media_type="application/json")
+
+@api_router.get("/feedback/{user_id}/summary")
+async def get_user_feedback_summary(user_id: str):
+    summary = await db.users.find_one(
+        {"id": user_id}, {"_id": 0, "rating": 1, "rating_count": 1, "rating_histogram": 1}
+    )
+    if summary is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if "rating_count" not in summary:
+        await reconcile_ratings([user_id])
+        summary = await db.users.find_one(
+            {"id": user_id}, {"_id": 0, "rating": 1, "rating_count": 1, "rating_histogram": 1}
+        ) or summary
+    histogram = summary.get("rating_histogram") or {}
+    return json_response({
+        "rating": summary.get("rating") or 0.0,
+        "rating_count": summary.get("rating_count", 0),
+        "rating_histogram": {str(n): histogram.get(str(n), 0) for n in RATING_STARS},
+    })
 
 # Analytics routes
 @api_router.get("/analytics/stats")
 async def get_analytics(current_user: dict = Depends(get_current_user)):
     if current_user["role"] == "student":
-        total_sessions = await db.sessions.count_documents({"student_id": current_user["id"]})
-        completed_sessions = await db.sessions.count_documents({"student_id": current_user["id"], "status": "completed"})
-        pending_sessions = await db.sessions.count_documents({"student_id": current_user["id"], "status": "pending"})
+        counts = await session_status_counts({"student_id": current_user["id"]})
+        total_sessions = sum(counts.values())
         
         return {
             "total_sessions": total_sessions,
-            "completed_sessions": completed_sessions,
-            "pending_sessions": pending_sessions,
-            "progress": round((completed_sessions / total_sessions * 100) if total_sessions > 0 else 0, 1)
+            "completed_sessions": counts["completed"],
+            "pending_sessions": counts["pending"],
+            "progress": round((counts["completed"] / total_sessions * 100) if total_sessions > 0 else 0, 1)
         }
     
     elif current_user["role"] == "mentor":
-        total_sessions = await db.sessions.count_documents({"mentor_id": current_user["id"]})
-        completed_sessions = await db.sessions.count_documents({"mentor_id": current_user["id"], "status": "completed"})
-        pending_sessions = await db.sessions.count_documents({"mentor_id": current_user["id"], "status": "pending"})
-        feedback_count = await db.feedback.count_documents({"to_user_id": current_user["id"]})
+        # Counted from the feedback itself: cached users and unreconciled aggregates can lag behind
+        counts, feedback_count = await asyncio.gather(
+            session_status_counts({"mentor_id": current_user["id"]}),
+            db.feedback.count_documents({"to_user_id": current_user["id"]}),
+        )
         
         return {
-            "total_sessions": total_sessions,
-            "completed_sessions": completed_sessions,
-            "pending_sessions": pending_sessions,
+            "total_sessions": sum(counts.values()),
+            "completed_sessions": counts["completed"],
+            "pending_sessions": counts["pending"],
             "feedback_count": feedback_count,
             "rating": current_user.get("rating", 0.0)
         }
     
     else:  # admin
-        total_users = await db.users.count_documents({})
-        total_students = await db.users.count_documents({"role": "student"})
-        total_mentors = await db.users.count_documents({"role": "mentor"})
-        total_sessions = await db.sessions.count_documents({})
-        completed_sessions = await db.sessions.count_documents({"status": "completed"})
+        counters = await singleflight.do("get_analytics", "platform", get_platform_counters)
         
         return {
-            "total_users": total_users,
-            "total_students": total_students,
-            "total_mentors": total_mentors,
-            "total_sessions": total_sessions,
-            "completed_sessions": completed_sessions
+            "total_users": sum(counters["users"].values()),
+            "total_students": counters["users"].get("student", 0),
+            "total_mentors": counters["users"].get("mentor", 0),
+            "total_sessions": sum(counters["sessions"].values()),
+            "completed_sessions": counters["sessions"].get("completed", 0)
         }
 
 @api_router.get("/analytics/chart-data")
 async def get_chart_data(current_user: dict = Depends(get_current_user)):
     # Simple chart data for progress tracking
     if current_user["role"] == "student":
-        sessions = await db.sessions.find({"student_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+        status_counts = await session_status_counts({"student_id": current_user["id"]})
     elif current_user["role"] == "mentor":
-        sessions = await db.sessions.find({"mentor_id": current_user["id"]}, {"_id": 0}).to_list(1000)
+        status_counts = await session_status_counts({"mentor_id": current_user["id"]})
     else:
-        sessions = await db.sessions.find({}, {"_id": 0}).to_list(1000)
-    
-    status_counts = {"pending": 0, "confirmed": 0, "completed": 0, "cancelled": 0}
-    for session in sessions:
-        status = session.get("status", "pending")
-        status_counts[status] = status_counts.get(status, 0) + 1
+        status_counts = dict.fromkeys(SESSION_STATUSES, 0)
+        status_counts.update((await singleflight.do("get_chart_data", "platform", get_platform_counters))["sessions"])
     
     return {
         "labels": list(status_counts.keys()),
         "data": list(status_counts.values())
     }
 
+@api_router.get("/analytics/timeseries")
+async def get_timeseries(
+    metric: str = Query("sessions", pattern="^(sessions|messages|feedback)$"),
+    unit: str = Query("day", pattern="^(day|week)$"),
+    mentor_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Per-day or per-week (Monday-based, UTC) counts for one mentor, or the platform for admins."""
+    if current_user["role"] == "mentor":
+        if mentor_id not in (None, current_user["id"]):
+            raise HTTPException(status_code=403, detail="Not authorized")
+        mentor_id = current_user["id"]
+    elif current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    step = timedelta(days=1 if unit == "day" else 7)
+    last_day = date_to or datetime.now(timezone.utc).date()
+    first_day = date_from or last_day - (step * 30 if unit == "day" else step * 12) + timedelta(days=1)
+    if unit == "week":
+        first_day -= timedelta(days=first_day.weekday())
+    range_start = datetime(first_day.year, first_day.month, first_day.day, tzinfo=timezone.utc)
+    range_end = datetime(last_day.year, last_day.month, last_day.day, tzinfo=timezone.utc) + timedelta(days=1)
+    if range_end <= range_start or (range_end - range_start) / step > TIMESERIES_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Date range must cover 1 to {TIMESERIES_MAX_BUCKETS} buckets")
+    
+    collection, owner_field = TIMESERIES_SOURCES[metric]
+    match = {"created_at": {"$gte": range_start, "$lt": range_end}}
+    if mentor_id:
+        match[owner_field] = mentor_id
+    truncate = {"date": "$created_at", "unit": unit}
+    if unit == "week":
+        truncate["startOfWeek"] = "monday"
+    group = {"_id": {"$dateTrunc": truncate}, "count": {"$sum": 1}}
+    if metric == "feedback":
+        group["avg_rating"] = {"$avg": "$rating"}
+    sources = [collection]
+    if collection in ARCHIVE_POLICIES:
+        horizon = await archive_horizon(collection)
+        if horizon is not None and range_start < horizon:
+            sources.append(archive_of(collection))
+    results = await asyncio.gather(*(
+        db[source].aggregate([{"$match": match}, {"$group": group}]).to_list(None) for source in sources
+    ))
+    
+    # Sum the tiers' buckets (feedback is never archived, so averages come from one source)
+    by_start = {}
+    for rows in results:
+        for row in rows:
+            bucket = by_start.setdefault(parse_timestamp(row["_id"]), {"count": 0})
+            bucket["count"] += row["count"]
+            if "avg_rating" in row:
+                bucket["avg_rating"] = row["avg_rating"]
+    
+    # Fill empty buckets so charts get a continuous axis
+    buckets = []
+    bucket_start = range_start
+    while bucket_start < range_end:
+        row = by_start.get(bucket_start, {})
+        bucket = {"start": bucket_start, "count": row.get("count", 0)}
+        if metric == "feedback":
+            bucket["avg_rating"] = round(row["avg_rating"], 2) if row.get("avg_rating") is not None else None
+        buckets.append(bucket)
+        bucket_start += step
+    
+    return json_response({"metric": metric, "unit": unit, "mentor_id": mentor_id, "buckets": buckets})
+
+
+# Metrics
+class MetricsMiddleware:
+    """Records latency, status and Mongo usage per route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass
+    straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        metrics.inc("http_requests_in_flight", {}, 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.inc("http_requests_in_flight", {}, -1)
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            metrics.inc("http_requests_total", {"method": method, "route": route_path, "status": status_code})
+            metrics.observe("http_request_duration_seconds", {"method": method, "route": route_path}, elapsed)
+            metrics.observe("http_request_mongo_commands", {"method": method, "route": route_path}, len(stats.commands))
+            if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                log_slow_request(method, scope["path"], status_code, elapsed, stats)
+
+def log_slow_request(method: str, path: str, status_code: int, elapsed: float, stats: RequestStats):
+    mongo_seconds = sum(seconds for _, _, seconds, _ in stats.commands)
+    queries = "; ".join(
+        f"{command} {collection} {seconds * 1000:.1f}ms{'' if ok else ' FAILED'}"
+        for command, collection, seconds, ok in stats.commands
+    )
+    logger.warning(
+        "Slow request %s %s -> %s in %.1fms; %d mongo commands (%.1fms): %s",
+        method, path, status_code, elapsed * 1000, len(stats.commands), mongo_seconds * 1000, queries or "none"
+    )
+
+def collect_component_stats():
+    counters = {"hits", "misses", "evictions", "completed", "failed", "rejected", "delivered", "overflows"}
+    components = [
+        ("user_cache", "User cache", user_cache.stats()),
+        ("password_hasher", "Password hashing pool", password_hasher.stats()),
+        ("message_hub", "Live message streams", message_hub.stats()),
+        ("singleflight", "Request coalescing", singleflight.stats()),
+        ("message_writes", "Message write batching", message_writes.stats()),
+        ("feedback_writes", "Feedback write batching", feedback_writes.stats()),
+    ]
+    samples = []
+    for prefix, description, stats in components:
+        for key, value in stats.items():
+            if isinstance(value, bool):
+                continue
+            if key in counters:
+                samples.append((f"{prefix}_{key}_total", "counter", f"{description} {key}.", {}, value))
+            else:
+                samples.append((f"{prefix}_{key}", "gauge", f"{description} {key}.", {}, value))
+    return samples
+
+metrics.register_collector(collect_component_stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# Probes
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    # Liveness only: answering at all means the event loop is running.
+    # Mongo outages are reported by /readyz so they don't get the pod restarted.
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    if not getattr(app.state, "ready", False):
+        return DefaultResponse({"status": "starting"}, status_code=503)
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT_SECONDS)
+    except Exception:
+        return DefaultResponse({"status": "unavailable", "mongo": "unreachable"}, status_code=503)
+    return {"status": "ready"}
 
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -629,14 +3605,75 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("startup")
-async def startup_event():
-    await seed_sample_data()
-    logger.info("Application started")
+async def run_seed_in_background():
+    try:
+        seeded = await seed_sample_data()
+    except Exception:
+        logger.exception("Seeding sample data failed")
+        seeded = False
+    if seeded:
+        await refresh_mentor_index()
+    if MATERIALIZED_COUNTERS:
+        try:
+            await rebuild_platform_counters()
+        except Exception:
+            logger.exception("Rebuilding platform counters failed")
+
+async def warm_connection_pool(connections: int = MONGO_WARMUP_CONNECTIONS):
+    """Open `connections` pooled sockets up front so the first requests skip the TCP/TLS/auth handshake."""
+    if connections <= 0:
+        return
+    # Concurrent pings each check out their own connection
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(min(connections, MONGO_MAX_POOL_SIZE))))
+
+async def start_application(app: FastAPI):
+    """Begin bringing the app to ready without holding up the server.
+
+    Uvicorn only accepts connections once lifespan startup returns, so the
+    warm-up runs as a task: /healthz answers straight away and /readyz
+    reports "starting" until prepare_application() finishes.
+    """
+    app.state.ready = False
+    app.state.startup_task = asyncio.create_task(prepare_application(app))
+
+async def prepare_application(app: FastAPI):
+    """Indexes, warm pool, mentor index and message hub, then mark ready.
+
+    An unreachable Mongo is retried every STARTUP_RETRY_SECONDS instead of
+    failing startup; /readyz keeps answering 503 meanwhile, so the replica
+    receives traffic only once its first requests will be served warm.
+    Seeding demo data and rebuilding counters continue in the background.
+    """
+    started = time.perf_counter()
+    while True:
+        try:
+            await asyncio.gather(warm_connection_pool(), ensure_indexes())
+            if os.environ.get('QUERY_PLAN_AUDIT', '').lower() in ('1', 'true'):
+                for name in await audit_query_plans():
+                    logger.warning("Query shape %s runs as a collection scan", name)
+            await refresh_mentor_index()
+            break
+        except Exception:
+            logger.exception("Application warm-up failed; retrying in %.0fs", STARTUP_RETRY_SECONDS)
+            await asyncio.sleep(STARTUP_RETRY_SECONDS)
+    await message_hub.start()
+    app.state.seed_task = asyncio.create_task(run_seed_in_background())
+    app.state.mentor_index_task = asyncio.create_task(refresh_mentor_index_periodically())
+    app.state.ready = True
+    logger.info("Application ready in %.0fms", (time.perf_counter() - started) * 1000)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
+async def stop_application(app: FastAPI):
+    # Fail readiness first so the load balancer drains this replica
+    app.state.ready = False
+    for name in ("startup_task", "seed_task", "mentor_index_task"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    # Requests have drained by now; commit whatever they left queued
+    await asyncio.gather(message_writes.close(), feedback_writes.close())
+    await message_hub.close()
     client.close()
+    password_hasher.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
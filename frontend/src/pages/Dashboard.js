@@ -1,9 +1,38 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { Link } from 'react-router-dom';
 
+const UNREAD_POLL_MS = 30000;
+
 const Dashboard = () => {
-    const { user, logout } = useAuth();
+    const { user, token, logout } = useAuth();
+    const [unreadCount, setUnreadCount] = useState(0);
+
+    const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+    useEffect(() => {
+        if (!token) return;
+        const fetchUnreadCount = async () => {
+            try {
+                const response = await fetch(`${API_BASE_URL}/api/messages/unread-count`, {
+                    headers: {
+                        'Authorization': `Bearer ${token}`,
+                    },
+                });
+
+                if (response.ok) {
+                    const data = await response.json();
+                    setUnreadCount(data.total);
+                }
+            } catch (error) {
+                console.error('Error fetching unread count:', error);
+            }
+        };
+
+        fetchUnreadCount();
+        const interval = setInterval(fetchUnreadCount, UNREAD_POLL_MS);
+        return () => clearInterval(interval);
+    }, [token]);
 
     return (
         <div className="min-h-screen bg-gray-50">
@@ -100,6 +129,11 @@ const Dashboard = () => {
                                                 <Link to="/messages" className="text-blue-600 hover:text-blue-500">
                                                     View Messages
                                                 </Link>
+                                                {unreadCount > 0 && (
+                                                    <span className="ml-2 px-2 py-1 text-xs font-medium bg-red-100 text-red-800 rounded-full">
+                                                        {unreadCount} unread
+                                                    </span>
+                                                )}
                                             </dd>
                                         </dl>
                                     </div>
@@ -6,6 +6,7 @@ const MentorDirectory = () => {
     const [loading, setLoading] = useState(true);
     const [searchTerm, setSearchTerm] = useState('');
     const [expertiseFilter, setExpertiseFilter] = useState('');
+    const [booking, setBooking] = useState(null);
     const { token } = useAuth();
 
     const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
@@ -38,12 +39,27 @@ const MentorDirectory = () => {
         }
     };
 
-    const bookSession = async (mentorId) => {
-        const date = prompt('Enter session date (YYYY-MM-DD):');
-        const time = prompt('Enter session time (HH:MM):');
-        const notes = prompt('Enter session notes (optional):');
+    const openSlotPicker = async (mentor) => {
+        setBooking({ mentor, slots: [], loading: true, notes: '' });
+        try {
+            const response = await fetch(`${API_BASE_URL}/api/mentors/${mentor.id}/slots`, {
+                headers: {
+                    'Authorization': `Bearer ${token}`,
+                },
+            });
+            const data = response.ok ? await response.json() : { slots: [] };
+            setBooking((current) => current && { ...current, slots: data.slots, loading: false });
+        } catch (error) {
+            console.error('Error fetching slots:', error);
+            setBooking((current) => current && { ...current, loading: false });
+        }
+    };
 
-        if (!date || !time) return;
+    const bookSlot = async (slot) => {
+        // Slots are UTC instants; the API takes the UTC date and time of the start
+        const start = new Date(slot.start);
+        const date = start.toISOString().slice(0, 10);
+        const time = start.toISOString().slice(11, 16);
 
         try {
             const response = await fetch(`${API_BASE_URL}/api/sessions`, {
@@ -53,24 +69,32 @@ const MentorDirectory = () => {
                     'Authorization': `Bearer ${token}`,
                 },
                 body: JSON.stringify({
-                    mentor_id: mentorId,
+                    mentor_id: booking.mentor.id,
                     date,
                     time,
-                    notes: notes || null,
+                    notes: booking.notes || null,
                 }),
             });
 
             if (response.ok) {
                 alert('Session booked successfully!');
+                setBooking(null);
             } else {
                 const error = await response.json();
                 alert(`Error: ${error.detail}`);
+                if (response.status === 409) {
+                    openSlotPicker(booking.mentor);
+                }
             }
         } catch (error) {
             alert('Error booking session');
         }
     };
 
+    const formatSlot = (slot) => new Date(slot.start).toLocaleString([], {
+        weekday: 'short', month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit',
+    });
+
     return (
         <div className="min-h-screen bg-gray-50">
             {/* Navigation */}
@@ -183,7 +207,7 @@ const MentorDirectory = () => {
                                             </div>
 
                                             <button
-                                                onClick={() => bookSession(mentor.id)}
+                                                onClick={() => openSlotPicker(mentor)}
                                                 className="w-full bg-blue-600 text-white py-2 px-4 rounded-md hover:bg-blue-700 focus:outline-none focus:ring-2 focus:ring-blue-500 focus:ring-offset-2"
                                             >
                                                 Book Session
@@ -196,6 +220,47 @@ const MentorDirectory = () => {
                     </div>
                 </div>
             </div>
+
+            {/* Slot picker */}
+            {booking && (
+                <div className="fixed inset-0 bg-black bg-opacity-40 flex items-center justify-center z-50">
+                    <div className="bg-white rounded-lg shadow-lg w-full max-w-md p-6">
+                        <h2 className="text-lg font-semibold text-gray-900 mb-4">
+                            Book a session with {booking.mentor.name}
+                        </h2>
+                        {booking.loading ? (
+                            <p className="text-gray-600">Loading open slots...</p>
+                        ) : booking.slots.length === 0 ? (
+                            <p className="text-gray-600">No open slots in the next two weeks.</p>
+                        ) : (
+                            <div className="max-h-64 overflow-y-auto grid grid-cols-2 gap-2 mb-4">
+                                {booking.slots.map((slot) => (
+                                    <button
+                                        key={slot.start}
+                                        onClick={() => bookSlot(slot)}
+                                        className="px-3 py-2 text-sm border border-blue-300 text-blue-700 rounded-md hover:bg-blue-50"
+                                    >
+                                        {formatSlot(slot)}
+                                    </button>
+                                ))}
+                            </div>
+                        )}
+                        <input
+                            type="text"
+                            placeholder="Session notes (optional)"
+                            className="w-full px-3 py-2 border border-gray-300 rounded-md mb-4"
+                            value={booking.notes}
+                            onChange={(e) => setBooking({ ...booking, notes: e.target.value })}
+                        />
+                        <button
+                            onClick={() => setBooking(null)}
+                            className="w-full bg-gray-100 text-gray-700 py-2 px-4 rounded-md hover:bg-gray-200"
+                        >
+                            Cancel
+                        </button>
+                    </div>
+                </div>
+            )}
         </div>
     );
 };
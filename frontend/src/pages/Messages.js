@@ -10,10 +10,65 @@ const Messages = () => {
 
     const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
+    // Same format as the server's read_cursor: base64url JSON of [{$date: created_at}, id]
+    const readCursor = (message) =>
+        btoa(JSON.stringify([{ $date: message.created_at }, message.id])).replace(/\+/g, '-').replace(/\//g, '_');
+
     useEffect(() => {
         fetchMessages();
     }, []);
 
+    // Live updates: the server pushes new messages instead of us polling.
+    // EventSource can't send headers, so each connection opens with a short-lived
+    // stream ticket; the access token never appears in a URL.
+    useEffect(() => {
+        if (!token) return;
+        let source = null;
+        let closed = false;
+        let lastEventId = null;
+
+        const connect = async () => {
+            try {
+                const response = await fetch(`${API_BASE_URL}/api/messages/stream-ticket`, {
+                    method: 'POST',
+                    headers: {
+                        'Authorization': `Bearer ${token}`,
+                    },
+                });
+                if (!response.ok || closed) return;
+                const { ticket } = await response.json();
+                const params = new URLSearchParams({ ticket });
+                if (lastEventId) params.append('cursor', lastEventId);
+                source = new EventSource(`${API_BASE_URL}/api/messages/stream?${params}`);
+
+                source.addEventListener('message', (event) => {
+                    lastEventId = event.lastEventId || lastEventId;
+                    const message = JSON.parse(event.data);
+                    setMessages((prev) => (prev.some((m) => m.id === message.id) ? prev : [message, ...prev]));
+                    markAsRead([message]);
+                });
+                source.addEventListener('resync', () => {
+                    lastEventId = null;
+                    fetchMessages();
+                });
+                // The ticket has expired by the time the browser would retry, so reconnect with a new one
+                source.onerror = () => {
+                    source.close();
+                    if (!closed) setTimeout(connect, 1000);
+                };
+            } catch (error) {
+                console.error('Error opening message stream:', error);
+                if (!closed) setTimeout(connect, 5000);
+            }
+        };
+
+        connect();
+        return () => {
+            closed = true;
+            if (source) source.close();
+        };
+    }, [token]);
+
     const fetchMessages = async () => {
         try {
             setLoading(true);
@@ -26,6 +81,7 @@ const Messages = () => {
             if (response.ok) {
                 const data = await response.json();
                 setMessages(data);
+                markAsRead(data);
             }
         } catch (error) {
             console.error('Error fetching messages:', error);
@@ -34,6 +90,30 @@ const Messages = () => {
         }
     };
 
+    // Everything on screen counts as seen: mark each sender's conversation read up to the
+    // newest message shown, so anything that arrives meanwhile stays unread
+    const markAsRead = async (items) => {
+        const newestBySender = new Map();
+        items
+            .filter((m) => !m.read && m.to_user_id === user.id)
+            .forEach((m) => {
+                const newest = newestBySender.get(m.from_user_id);
+                if (!newest || m.created_at > newest.created_at || (m.created_at === newest.created_at && m.id > newest.id)) {
+                    newestBySender.set(m.from_user_id, m);
+                }
+            });
+        await Promise.all([...newestBySender].map(([senderId, newest]) =>
+            fetch(`${API_BASE_URL}/api/messages/read`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Authorization': `Bearer ${token}`,
+                },
+                body: JSON.stringify({ user_id: senderId, up_to: readCursor(newest) }),
+            }).catch((error) => console.error('Error marking messages read:', error))
+        ));
+    };
+
     const sendMessage = async () => {
         if (!newMessage.trim() || !selectedUser) return;
 
@@ -51,8 +131,8 @@ const Messages = () => {
             });
 
             if (response.ok) {
+                // The new message arrives through the live stream
                 setNewMessage('');
-                fetchMessages();
             } else {
                 alert('Error sending message');
             }
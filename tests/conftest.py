@@ -0,0 +1,56 @@
+"""Shared fixtures: import the backend with test settings and swap in an in-memory or throwaway database."""
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+# The client is created with connect=False, so importing server does no network I/O
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "mentor_bridge_test")
+
+import server  # noqa: E402
+
+MONGO_TEST_URL = os.environ.get("MONGO_TEST_URL", "mongodb://localhost:27017")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh mongomock-motor database installed as server.db, with in-process caches cleared."""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    database = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["mentor_bridge_test"]
+    monkeypatch.setattr(server, "db", database)
+    server.user_cache.clear()
+    server.archive_horizons.clear()
+    yield database
+    server.user_cache.clear()
+    server.archive_horizons.clear()
+
+
+@pytest.fixture
+async def mongod_db(monkeypatch):
+    """A throwaway database on a real mongod (MONGO_TEST_URL), for features mongomock lacks; skips when none is reachable."""
+    client = AsyncIOMotorClient(MONGO_TEST_URL, tz_aware=True, serverSelectionTimeoutMS=500)
+    try:
+        await client.admin.command("ping")
+    except PyMongoError:
+        client.close()
+        pytest.skip(f"no mongod reachable at {MONGO_TEST_URL}")
+    name = f"mentor_bridge_test_{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(server, "db", client[name])
+    server.user_cache.clear()
+    server.archive_horizons.clear()
+    yield client[name]
+    await client.drop_database(name)
+    client.close()
+    server.user_cache.clear()
+    server.archive_horizons.clear()
@@ -0,0 +1,76 @@
+"""Admin session listing and export."""
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@asynccontextmanager
+async def api_as(user_id):
+    token = server.create_access_token({"sub": user_id})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+@pytest.fixture
+async def sessions(db):
+    await db.users.insert_many([
+        {"id": "admin", "email": "admin@example.com", "name": "Admin", "role": "admin"},
+        {"id": "s1", "email": "s1@example.com", "name": "Ann", "role": "student"},
+        {"id": "m1", "email": "m1@example.com", "name": "Mo", "role": "mentor"},
+    ])
+    now = server.utc_now().replace(microsecond=0)
+    docs = [
+        {"id": f"s{i}", "student_id": "s1", "mentor_id": "m1", "status": status, "date": f"2026-03-0{i}",
+         "time": "10:00", "notes": None, "created_at": now - timedelta(hours=i)}
+        for i, status in enumerate(["pending", "completed", "pending", "cancelled", "pending"], start=1)
+    ]
+    await db.sessions.insert_many(docs)
+    return docs
+
+
+async def test_listing_pages_with_cursor_and_filters(sessions):
+    async with api_as("admin") as client:
+        first = (await client.get("/api/admin/sessions", params={"limit": 2})).json()
+        second = (await client.get("/api/admin/sessions", params={"limit": 2, "cursor": first["next_cursor"]})).json()
+        pending = (await client.get("/api/admin/sessions", params={"status": "pending", "sort": "date", "order": "asc"})).json()
+        invalid = await client.get("/api/admin/sessions", params={"status": "lost"})
+
+    assert [s["id"] for s in first["items"]] == ["s1", "s2"]
+    assert [s["id"] for s in second["items"]] == ["s3", "s4"]
+    assert first["items"][0]["student_name"] == "Ann" and first["items"][0]["mentor_name"] == "Mo"
+    assert [s["id"] for s in pending["items"]] == ["s1", "s3", "s5"]
+    assert pending["next_cursor"] is None
+    assert invalid.status_code == 400
+
+
+async def test_listing_is_admin_only(sessions):
+    async with api_as("s1") as client:
+        assert (await client.get("/api/admin/sessions")).status_code == 403
+        assert (await client.get("/api/admin/sessions/export")).status_code == 403
+
+
+async def test_export_streams_every_match(sessions):
+    async with api_as("admin") as client:
+        ndjson = await client.get("/api/admin/sessions/export", params={"mentor_id": "m1"})
+        exported_csv = await client.get("/api/admin/sessions/export", params={"format": "csv", "status": "pending"})
+
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    # Oldest first
+    assert [row["id"] for row in rows] == ["s5", "s4", "s3", "s2", "s1"]
+
+    assert 'filename="sessions.csv"' in exported_csv.headers["content-disposition"]
+    table = list(csv.DictReader(io.StringIO(exported_csv.text)))
+    assert [(row["id"], row["student_name"], row["status"]) for row in table] == [
+        ("s5", "Ann", "pending"), ("s3", "Ann", "pending"), ("s1", "Ann", "pending"),
+    ]
@@ -0,0 +1,29 @@
+"""Dashboard analytics."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def mentor_client(db):
+    # A legacy mentor: feedback exists but rating aggregates were never built
+    await db.users.insert_one({"id": "m1", "email": "m1@example.com", "name": "Mentor", "role": "mentor", "rating": 4.5})
+    token = server.create_access_token({"sub": "m1"})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+async def test_mentor_stats_count_feedback_documents(mentor_client, db):
+    await db.sessions.insert_many([
+        {"id": "s1", "mentor_id": "m1", "student_id": "a", "status": "completed", "created_at": server.utc_now()},
+        {"id": "s2", "mentor_id": "m1", "student_id": "a", "status": "pending", "created_at": server.utc_now()},
+    ])
+    await db.feedback.insert_many([{"id": f"f{i}", "to_user_id": "m1", "rating": 5} for i in range(3)])
+
+    stats = (await mentor_client.get("/api/analytics/stats")).json()
+    assert stats["feedback_count"] == 3
+    assert (stats["total_sessions"], stats["completed_sessions"], stats["pending_sessions"]) == (2, 1, 1)
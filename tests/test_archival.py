@@ -0,0 +1,109 @@
+"""Archive horizon caching and the archiver."""
+from datetime import timedelta
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def message(message_id, age_days, read=True):
+    return {
+        "id": message_id,
+        "from_user_id": "a",
+        "to_user_id": "b",
+        "content": message_id,
+        "read": read,
+        "created_at": server.utc_now() - timedelta(days=age_days),
+    }
+
+
+async def test_horizon_is_read_once_per_ttl(db):
+    assert await server.archive_horizon("messages") is None
+    horizon = server.utc_now().replace(microsecond=0)
+    await db.migrations.insert_one({"_id": "archive:messages", "horizon": horizon})
+
+    # Still the cached value until it expires or is refreshed
+    assert await server.archive_horizon("messages") is None
+    assert await server.archive_horizon("messages", refresh=True) == horizon
+
+
+async def test_archiver_refreshes_cached_horizon(db):
+    await db.messages.insert_many([
+        message("old-read", server.MESSAGE_HOT_DAYS + 10),
+        message("old-unread", server.MESSAGE_HOT_DAYS + 11, read=False),
+        message("new", 1),
+    ])
+    assert await server.archive_horizon("messages") is None
+
+    assert await server.archive_collection("messages", settle_seconds=0) == 1
+    horizon = await server.archive_horizon("messages")
+    assert horizon is not None
+    assert [doc["id"] async for doc in db.messages_archive.find()] == ["old-read"]
+
+    query = {"$or": [{"from_user_id": "a"}, {"to_user_id": "a"}]}
+    page = await server.find_page("messages", query, [("created_at", server.DESCENDING)], 10)
+    assert [doc["id"] for doc in page] == ["new", "old-read", "old-unread"]
+
+
+async def set_horizon(db, collection, horizon):
+    await db.migrations.insert_one({"_id": f"archive:{collection}", "horizon": horizon})
+    await server.archive_horizon(collection, refresh=True)
+
+
+async def test_find_page_merges_tiers_in_order(db):
+    now = server.utc_now().replace(microsecond=0)
+    await set_horizon(db, "messages", now - timedelta(days=5))
+    await db.messages.insert_many([
+        {"id": "hot-1", "to_user_id": "a", "created_at": now - timedelta(days=1)},
+        {"id": "hot-old", "to_user_id": "a", "created_at": now - timedelta(days=8)},
+        # Caught mid-move: present in both tiers, returned once
+        {"id": "both", "to_user_id": "a", "created_at": now - timedelta(days=7)},
+    ])
+    await db.messages_archive.insert_many([
+        {"id": "cold-1", "to_user_id": "a", "created_at": now - timedelta(days=6), "archived_at": now},
+        {"id": "both", "to_user_id": "a", "created_at": now - timedelta(days=7), "archived_at": now},
+        {"id": "cold-2", "to_user_id": "a", "created_at": now - timedelta(days=9), "archived_at": now},
+    ])
+
+    newest_first = [("created_at", server.DESCENDING), ("id", server.DESCENDING)]
+    page = await server.find_page("messages", {"to_user_id": "a"}, newest_first, 4)
+    assert [doc["id"] for doc in page] == ["hot-1", "cold-1", "both", "hot-old"]
+    assert all("archived_at" not in doc for doc in page)
+
+    oldest_first = [("created_at", server.ASCENDING), ("id", server.ASCENDING)]
+    page = await server.find_page("messages", {"to_user_id": "a"}, oldest_first, 2)
+    assert [doc["id"] for doc in page] == ["cold-2", "hot-old"]
+
+
+async def test_find_page_skips_archive_when_hot_page_is_newer_than_horizon(db):
+    now = server.utc_now().replace(microsecond=0)
+    await set_horizon(db, "messages", now - timedelta(days=5))
+    await db.messages.insert_many([
+        {"id": f"hot-{i}", "to_user_id": "a", "created_at": now - timedelta(days=i)} for i in range(3)
+    ])
+    # Breaks the horizon invariant on purpose: it would lead the page if the archive were read
+    await db.messages_archive.insert_one({"id": "cold", "to_user_id": "a", "created_at": now})
+
+    page = await server.find_page("messages", {"to_user_id": "a"}, [("created_at", server.DESCENDING)], 2)
+    assert [doc["id"] for doc in page] == ["hot-0", "hot-1"]
+
+
+async def test_message_listing_streams_both_tiers(db):
+    now = server.utc_now().replace(microsecond=0)
+    await db.users.insert_many([
+        {"id": "a", "email": "a@example.com", "name": "Ann", "role": "student"},
+        {"id": "b", "email": "b@example.com", "name": "Bo", "role": "mentor"},
+    ])
+    await set_horizon(db, "messages", now - timedelta(days=5))
+    await db.messages.insert_one({**message("hot", 1), "from_user_id": "b", "to_user_id": "a"})
+    await db.messages_archive.insert_one({**message("cold", 10), "from_user_id": "a", "to_user_id": "b"})
+
+    token = server.create_access_token({"sub": "a"})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/api/messages", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert [(m["id"], m["from_user_name"]) for m in response.json()] == [("hot", "Bo"), ("cold", "Ann")]
@@ -0,0 +1,23 @@
+"""Account registration."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.parametrize("role", ["admin", "superuser"])
+async def test_register_rejects_privileged_or_unknown_roles(client, db, role):
+    response = await client.post("/api/auth/register", json={
+        "email": "eve@example.com", "name": "Eve", "password": "secret", "role": role,
+    })
+    assert response.status_code == 400
+    assert await db.users.count_documents({}) == 0
@@ -0,0 +1,91 @@
+"""Mentor slots and double-booking protection."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+TOMORROW = (datetime.now(timezone.utc) + timedelta(days=1)).date()
+
+
+@asynccontextmanager
+async def api_as(user_id):
+    token = server.create_access_token({"sub": user_id})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+async def add_users(database, availability=None):
+    mentor = {"id": "m1", "email": "m1@example.com", "name": "Mentor", "role": "mentor"}
+    if availability is not None:
+        mentor["availability"] = availability
+    await database.users.insert_many([
+        mentor,
+        {"id": "s1", "email": "s1@example.com", "name": "Ann", "role": "student"},
+        {"id": "s2", "email": "s2@example.com", "name": "Bo", "role": "student"},
+    ])
+
+
+def booking(time="10:00", day=TOMORROW):
+    return {"mentor_id": "m1", "date": day.isoformat(), "time": time}
+
+
+async def test_slots_follow_availability_and_skip_booked_ones(db):
+    weekday = TOMORROW.weekday()
+    await add_users(db, [{"weekday": weekday, "start": "09:00", "end": "12:00"}])
+    start = datetime(TOMORROW.year, TOMORROW.month, TOMORROW.day, 10, tzinfo=timezone.utc)
+    await db.sessions.insert_one({"id": "taken", "mentor_id": "m1", "start": start, "slot_held": True})
+
+    async with api_as("s1") as client:
+        response = await client.get("/api/mentors/m1/slots", params={"date_from": TOMORROW, "date_to": TOMORROW})
+    assert response.status_code == 200
+    assert [slot["start"][11:16] for slot in response.json()["slots"]] == ["09:00", "11:00"]
+
+
+async def test_published_empty_availability_offers_nothing(db):
+    await add_users(db, [])
+    async with api_as("s1") as client:
+        slots = await client.get("/api/mentors/m1/slots", params={"date_from": TOMORROW, "date_to": TOMORROW})
+        booked = await client.post("/api/sessions", json=booking())
+    assert slots.json()["slots"] == []
+    assert booked.status_code == 400
+
+
+@pytest.mark.parametrize("time", ["10:30", "25:00"])
+async def test_times_off_slot_boundaries_are_rejected(db, time):
+    await add_users(db)
+    async with api_as("s1") as client:
+        response = await client.post("/api/sessions", json=booking(time))
+    assert response.status_code == 400
+    assert await db.sessions.count_documents({}) == 0
+
+
+async def test_past_slots_are_rejected(db):
+    await add_users(db)
+    async with api_as("s1") as client:
+        response = await client.post("/api/sessions", json=booking(day=TOMORROW - timedelta(days=2)))
+    assert response.status_code == 400
+
+
+async def test_second_booking_conflicts_until_the_first_is_cancelled(mongod_db):
+    # The guard is a partial unique index, which mongomock does not enforce
+    await server.ensure_indexes()
+    await add_users(mongod_db)
+    async with api_as("s1") as first, api_as("s2") as second:
+        booked = await first.post("/api/sessions", json=booking())
+        assert booked.status_code == 200
+        assert (await second.post("/api/sessions", json=booking())).status_code == 409
+
+        cancelled = await first.put(f"/api/sessions/{booked.json()['id']}/status", params={"status": "cancelled"})
+        assert cancelled.status_code == 200
+        rebooked = await second.post("/api/sessions", json=booking())
+        assert rebooked.status_code == 200
+
+        # Reviving the cancelled session cannot take the slot back
+        revived = await first.put(f"/api/sessions/{booked.json()['id']}/status", params={"status": "pending"})
+        assert revived.status_code == 409
@@ -0,0 +1,48 @@
+"""Backfilling conversation threads for messages stored before they existed."""
+from datetime import timedelta
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def legacy_message(message_id, sender, recipient, minutes_ago, read=False):
+    return {
+        "id": message_id,
+        "from_user_id": sender,
+        "to_user_id": recipient,
+        "content": message_id,
+        "read": read,
+        "created_at": server.utc_now().replace(microsecond=0) - timedelta(minutes=minutes_ago),
+    }
+
+
+async def test_backfill_stamps_messages_and_rebuilds_threads(db):
+    # A thread written by a current worker must not stop older messages being backfilled
+    await db.conversations.insert_one({"user_id": "x", "counterpart_id": "y", "unread_count": 0})
+    await db.messages.insert_many([
+        legacy_message("m1", "a", "b", 30),
+        legacy_message("m2", "b", "a", 20, read=True),
+        legacy_message("m3", "a", "b", 10),
+        legacy_message("m4", "a", "c", 5),
+    ])
+
+    assert await server.backfill_conversations(batch_size=2) == 4
+    assert await db.messages.count_documents({"conversation_id": {"$exists": False}}) == 0
+    assert await db.messages.count_documents({"conversation_id": "a:b"}) == 3
+
+    rows = {
+        (row["user_id"], row["counterpart_id"]): row
+        async for row in db.conversations.find({"user_id": {"$in": ["a", "b", "c"]}})
+    }
+    assert set(rows) == {("a", "b"), ("b", "a"), ("a", "c"), ("c", "a")}
+    assert rows[("a", "b")]["last_message"]["id"] == "m3"
+    assert rows[("b", "a")]["unread_count"] == 2
+    assert rows[("a", "b")]["unread_count"] == 0
+    assert rows[("c", "a")]["unread_count"] == 1
+
+    # Nothing left to do, and the rows are unchanged
+    assert await server.backfill_conversations() == 0
+    assert await db.conversations.count_documents({}) == 5
@@ -0,0 +1,100 @@
+"""Native datetime storage: the online migration, mixed-type reads and time-bucketed analytics."""
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@asynccontextmanager
+async def api_as(user_id):
+    token = server.create_access_token({"sub": user_id})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+def test_sort_key_orders_legacy_strings_with_dates():
+    docs = [
+        {"id": "b", "created_at": utc(2026, 3, 2)},
+        {"id": "a", "created_at": "2026-03-03T00:00:00+00:00"},
+        {"id": "c", "created_at": "2026-03-01T12:00:00"},  # naive strings are UTC
+        {"id": "d"},
+    ]
+    ordered = sorted(docs, key=server.sort_key([("created_at", server.DESCENDING), ("id", server.DESCENDING)]), reverse=True)
+    assert [doc["id"] for doc in ordered] == ["a", "b", "c", "d"]
+
+
+async def test_find_page_merges_tiers_before_migration(db):
+    await db.migrations.insert_one({"_id": "archive:messages", "horizon": utc(2026, 3, 5)})
+    await db.messages.insert_one({"id": "legacy", "to_user_id": "a", "created_at": "2026-03-04T00:00:00+00:00"})
+    await db.messages_archive.insert_one({"id": "cold", "to_user_id": "a", "created_at": utc(2026, 3, 1)})
+
+    page = await server.find_page("messages", {"to_user_id": "a"}, [("created_at", server.DESCENDING)], 10)
+    assert [doc["id"] for doc in page] == ["legacy", "cold"]
+
+
+async def test_migration_converts_strings_and_resumes(db):
+    await db.sessions.insert_many([
+        {"id": "s1", "created_at": "2026-03-01T10:00:00+00:00", "date": "2026-03-09", "time": "14:00"},
+        {"id": "s2", "created_at": utc(2026, 3, 1), "start": utc(2026, 3, 10, 9)},
+        {"id": "s3", "created_at": "not a date", "date": "someday", "time": "noon"},
+    ])
+    await db.conversations.insert_one({"user_id": "a", "last_message_at": "2026-03-01T10:00:00",
+                                       "last_message": {"created_at": "2026-03-01T10:00:00"}})
+
+    assert await server.migrate_datetimes("sessions", batch_size=2) == 1
+    s1 = await db.sessions.find_one({"id": "s1"})
+    assert (s1["created_at"], s1["start"]) == (utc(2026, 3, 1, 10), utc(2026, 3, 9, 14))
+    assert (await db.sessions.find_one({"id": "s3"}))["created_at"] == "not a date"
+    assert (await db.migrations.find_one({"_id": "datetimes:sessions"}))["done"] is True
+
+    assert await server.migrate_datetimes("conversations") == 1
+    conversation = await db.conversations.find_one({"user_id": "a"})
+    assert conversation["last_message_at"] == conversation["last_message"]["created_at"] == utc(2026, 3, 1, 10)
+
+    # Finished collections are skipped; --restart walks them again with nothing left to convert
+    await db.sessions.insert_one({"id": "s4", "created_at": "2026-03-02T00:00:00+00:00"})
+    assert await server.migrate_datetimes("sessions") == 0
+    assert await server.migrate_datetimes("sessions", restart=True) == 1
+
+
+async def test_timeseries_is_for_mentors_and_admins(db):
+    await db.users.insert_one({"id": "s1", "email": "s1@example.com", "name": "S", "role": "student"})
+    async with api_as("s1") as client:
+        assert (await client.get("/api/analytics/timeseries")).status_code == 403
+
+
+async def test_timeseries_buckets_span_both_tiers(mongod_db):
+    # $dateTrunc needs a real mongod
+    await mongod_db.users.insert_one({"id": "m1", "email": "m1@example.com", "name": "M", "role": "mentor"})
+    await mongod_db.migrations.insert_one({"_id": "archive:sessions", "horizon": utc(2026, 3, 4)})
+    await mongod_db.sessions.insert_many([
+        {"id": "h1", "mentor_id": "m1", "created_at": utc(2026, 3, 4, 8)},
+        {"id": "h2", "mentor_id": "m1", "created_at": utc(2026, 3, 10, 23)},
+        {"id": "other", "mentor_id": "m2", "created_at": utc(2026, 3, 4, 8)},
+    ])
+    await mongod_db.sessions_archive.insert_one({"id": "a1", "mentor_id": "m1", "created_at": utc(2026, 3, 2, 1)})
+
+    async with api_as("m1") as client:
+        daily = (await client.get("/api/analytics/timeseries", params={
+            "date_from": "2026-03-02", "date_to": "2026-03-04",
+        })).json()
+        weekly = (await client.get("/api/analytics/timeseries", params={
+            "unit": "week", "date_from": "2026-03-04", "date_to": "2026-03-15",
+        })).json()
+    assert [(bucket["start"][:10], bucket["count"]) for bucket in daily["buckets"]] == [
+        ("2026-03-02", 1), ("2026-03-03", 0), ("2026-03-04", 1),
+    ]
+    # Weeks start on Monday, so the range widens back to 2 March
+    assert [(bucket["start"][:10], bucket["count"]) for bucket in weekly["buckets"]] == [
+        ("2026-03-02", 2), ("2026-03-09", 1),
+    ]
@@ -0,0 +1,54 @@
+"""Generated load-test data and background seeding."""
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sessions_take_distinct_mentor_slots(db):
+    await server.seed_fixture_data(students=5, mentors=2, sessions=500, batch_size=100)
+    sessions = await db.sessions.find({}, {"_id": 0, "mentor_id": 1, "start": 1}).to_list(None)
+    assert len(sessions) == 500
+    assert len({(s["mentor_id"], s["start"]) for s in sessions}) == 500
+
+
+async def test_more_sessions_than_slots_is_rejected_up_front(db):
+    with pytest.raises(ValueError):
+        await server.seed_fixture_data(students=1, mentors=1, sessions=server.FIXTURE_SLOTS_PER_MENTOR + 1)
+    assert await db.users.count_documents({}) == 0
+
+
+async def test_same_seed_generates_the_same_ids(db):
+    async def ids():
+        users = await db.users.find({}, {"_id": 0, "id": 1}).sort("id", 1).to_list(None)
+        sessions = await db.sessions.find({}, {"_id": 0, "id": 1, "student_id": 1, "mentor_id": 1}).sort("id", 1).to_list(None)
+        await db.users.delete_many({})
+        await db.sessions.delete_many({})
+        return users, sessions
+
+    await server.seed_fixture_data(students=3, mentors=2, sessions=10, seed=7)
+    first = await ids()
+    await server.seed_fixture_data(students=3, mentors=2, sessions=10, seed=7)
+    second = await ids()
+    await server.seed_fixture_data(students=3, mentors=2, sessions=10, seed=8)
+    other = await ids()
+
+    assert first == second
+    assert {u["id"] for u in first[0]}.isdisjoint(u["id"] for u in other[0])
+
+
+async def test_background_seed_logs_a_failed_counter_rebuild(monkeypatch, caplog):
+    async def seed_sample_data():
+        return False
+
+    async def rebuild_platform_counters():
+        raise RuntimeError("mongo went away")
+
+    monkeypatch.setattr(server, "seed_sample_data", seed_sample_data)
+    monkeypatch.setattr(server, "rebuild_platform_counters", rebuild_platform_counters)
+    monkeypatch.setattr(server, "MATERIALIZED_COUNTERS", True)
+
+    await server.run_seed_in_background()
+
+    assert "Rebuilding platform counters failed" in caplog.text
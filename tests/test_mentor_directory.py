@@ -0,0 +1,42 @@
+"""The mentor directory and its search index."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def mentor(index):
+    return {"id": f"m{index:03d}", "email": f"m{index}@example.com", "name": f"Mentor {index}", "role": "mentor",
+            "expertise": ["python"], "rating": 4.0}
+
+
+@pytest.fixture
+async def client(db, monkeypatch):
+    index = server.MentorSearchIndex()
+    index.rebuild([mentor(i) for i in range(server.DEFAULT_PAGE_SIZE + 10)])
+    monkeypatch.setattr(server, "mentor_index", index)
+    server.directory_response_cache.clear()
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    server.directory_response_cache.clear()
+
+
+async def test_unpaginated_directory_lists_every_mentor(client):
+    response = await client.get("/api/mentors")
+    assert response.status_code == 200
+    assert len(response.json()) == server.DEFAULT_PAGE_SIZE + 10
+
+    response = await client.get("/api/mentors", params={"limit": 5, "offset": 58})
+    assert len(response.json()) == 2
+
+
+def test_rebuild_keeps_counting_generations():
+    index = server.MentorSearchIndex()
+    index.rebuild([mentor(1)])
+    generation = index.generation
+    index.rebuild([mentor(2)])
+    assert index.generation > generation
+    assert index.get("m001") is None and index.get("m002") is not None
@@ -0,0 +1,59 @@
+"""Vectorized mentor recommendations."""
+import pytest
+
+import server
+
+
+def mentor(mentor_id, expertise, rating=4.0, years=5):
+    return {"id": mentor_id, "expertise": expertise, "rating": rating, "years_experience": years}
+
+
+@pytest.fixture
+def matcher():
+    matcher = server.MentorMatcher(capacity=2)
+    matcher.rebuild([
+        mentor("python", ["Python", "Django"]),
+        mentor("ml", ["Python", "Machine Learning"]),
+        mentor("design", ["Figma"]),
+    ], loads={})
+    return matcher
+
+
+def ranked(matcher, tags, limit=10):
+    return [mentor_id for mentor_id, _, _ in matcher.recommend(set(tags), limit)]
+
+
+def test_tag_overlap_ranks_first(matcher):
+    assert ranked(matcher, ["python", "machine learning"])[0] == "ml"
+    assert ranked(matcher, ["figma"])[0] == "design"
+    mentor_id, _, matched = matcher.recommend({"python", "django"}, 1)[0]
+    assert (mentor_id, matched) == ("python", ["django", "python"])
+
+
+def test_quality_breaks_ties_without_tags(matcher):
+    matcher.upsert(mentor("design", ["Figma"], rating=5.0, years=20))
+    assert ranked(matcher, [])[0] == "design"
+
+
+def test_open_sessions_push_a_mentor_down(matcher):
+    assert ranked(matcher, ["python"])[:2] == ["python", "ml"]
+    matcher.adjust_load("python", 10)
+    assert ranked(matcher, ["python"])[:2] == ["ml", "python"]
+    matcher.adjust_load("python", -10)
+    assert ranked(matcher, ["python"])[:2] == ["python", "ml"]
+
+
+def test_removed_mentors_free_their_row(matcher):
+    matcher.remove("ml")
+    assert "ml" not in ranked(matcher, ["python", "machine learning"])
+    matcher.upsert(mentor("rust", ["Rust"]))
+    assert len(matcher) == 3
+    assert ranked(matcher, ["rust"])[0] == "rust"
+    assert ranked(matcher, ["python"], limit=1) == ["python"]
+
+
+def test_profile_edit_rewrites_tags(matcher):
+    matcher.upsert(mentor("design", ["Django"], rating=5.0))
+    assert ranked(matcher, ["django"])[0] == "design"
+    matcher.upsert(mentor("design", ["Figma"]))
+    assert ranked(matcher, ["django"])[0] == "python"
@@ -0,0 +1,64 @@
+"""The server-sent message stream: ticket authentication and pub/sub backends."""
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user(db):
+    doc = {"id": "u1", "email": "u1@example.com", "name": "U1", "role": "student"}
+    await db.users.insert_one(dict(doc))
+    return doc
+
+
+async def test_stream_ticket_authenticates_only_the_stream(user):
+    ticket = server.create_stream_ticket(user["id"])
+    assert (await server.user_from_token(ticket, scope=server.STREAM_TICKET_SCOPE))["id"] == "u1"
+    # A ticket is not an access token...
+    with pytest.raises(server.HTTPException):
+        await server.user_from_token(ticket)
+    # ...and an access token is not a ticket
+    with pytest.raises(server.HTTPException):
+        await server.user_from_token(server.create_access_token({"sub": "u1"}), scope=server.STREAM_TICKET_SCOPE)
+
+
+async def test_expired_ticket_is_rejected(user, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_TICKET_TTL_SECONDS", -1)
+    with pytest.raises(server.HTTPException):
+        await server.user_from_token(server.create_stream_ticket("u1"), scope=server.STREAM_TICKET_SCOPE)
+
+
+def test_pubsub_backend_requires_publish():
+    class Incomplete(server.PubSubBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+async def test_change_stream_backend_closes_without_start():
+    backend = server.MongoChangeStreamBackend()
+    await backend.close()
+
+
+async def test_change_stream_backend_close_stops_the_watcher(monkeypatch):
+    watching = asyncio.Event()
+
+    async def watch(self):
+        watching.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(server.MongoChangeStreamBackend, "_watch", watch)
+    backend = server.MongoChangeStreamBackend()
+    await backend.start(lambda user_id, event: None)
+    await watching.wait()
+    task = backend._task
+
+    await backend.close()
+
+    assert task.cancelled()
+    await backend.close()
@@ -0,0 +1,57 @@
+"""Request metrics and the /metrics endpoint."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def sample(text, series):
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.fixture
+async def client(db):
+    await db.users.insert_one({"id": "u1", "email": "u1@example.com", "name": "U1", "role": "student"})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_requests_are_labelled_by_route_template(client):
+    found = 'http_requests_total{method="GET",route="/api/users/{user_id}",status="200"}'
+    missing = 'http_requests_total{method="GET",route="/api/users/{user_id}",status="404"}'
+    unmatched = 'http_requests_total{method="GET",route="unmatched",status="404"}'
+    before = (await client.get("/metrics")).text
+
+    await client.get("/api/users/u1")
+    await client.get("/api/users/u1")
+    await client.get("/api/users/nobody")
+    await client.get("/api/no-such-route/123")
+
+    response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    after = response.text
+    assert sample(after, found) - sample(before, found) == 2
+    assert sample(after, missing) - sample(before, missing) == 1
+    assert sample(after, unmatched) - sample(before, unmatched) == 1
+    # Raw paths never become labels, so ids cannot blow up the series count
+    assert "/api/users/u1" not in after
+    assert "# TYPE http_request_duration_seconds histogram" in after
+    assert "# TYPE user_cache_hits_total counter" in after
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = server.MetricsRegistry()
+    registry.define("latency_seconds", "histogram", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5):
+        registry.observe("latency_seconds", {"route": "/x"}, value)
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/x",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/x"} 3' in text
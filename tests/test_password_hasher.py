@@ -0,0 +1,59 @@
+"""The bounded bcrypt pool."""
+import asyncio
+import threading
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_failed_jobs_are_not_counted_as_completed():
+    hasher = server.PasswordHasher(workers=1, max_queue=1)
+
+    def broken(password):
+        raise ValueError(password)
+
+    try:
+        assert await hasher.run(str.upper, "ok") == "OK"
+        with pytest.raises(ValueError):
+            await hasher.run(broken, "bad")
+    finally:
+        hasher.shutdown()
+    stats = hasher.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
+
+
+async def test_cancelled_caller_keeps_the_slot_until_the_job_finishes():
+    hasher = server.PasswordHasher(workers=1, max_queue=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(password):
+        started.set()
+        release.wait(5)
+        return password
+
+    try:
+        caller = asyncio.create_task(hasher.run(slow, "pw"))
+        await asyncio.to_thread(started.wait, 5)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        # The job is still running on the only worker, so there is no room
+        assert hasher.in_flight == 1
+        with pytest.raises(server.HTTPException) as busy:
+            await hasher.run(str.upper, "next")
+        assert busy.value.status_code == 503
+
+        release.set()
+        for _ in range(100):
+            if hasher.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert (hasher.in_flight, hasher.completed) == (0, 1)
+        assert await hasher.run(str.upper, "next") == "NEXT"
+    finally:
+        release.set()
+        hasher.shutdown()
@@ -0,0 +1,47 @@
+"""Profile photo uploads."""
+import struct
+import zlib
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(db):
+    await db.users.insert_one({"id": "u1", "email": "u1@example.com", "name": "U1", "role": "student"})
+    token = server.create_access_token({"sub": "u1"})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+def png_header(width, height):
+    """A PNG that declares `width` x `height` pixels but carries almost no data."""
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(b"")) + chunk(b"IEND", b"")
+
+
+async def test_malformed_content_length_is_a_bad_request(client):
+    response = await client.put("/api/users/photo", content=b"x", headers={"Content-Length": "lots"})
+    assert response.status_code == 400
+
+
+async def test_oversized_dimensions_are_rejected_before_decoding(client):
+    pytest.importorskip("PIL")
+    response = await client.put("/api/users/photo", content=png_header(20_000, 20_000))
+    assert response.status_code == 413
+
+
+def test_photo_store_requires_put_and_get():
+    class GetOnly(server.PhotoStore):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
@@ -0,0 +1,117 @@
+"""Liveness and readiness probes, and startup surviving an unreachable Mongo."""
+import asyncio
+
+import httpx
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client():
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def app_state():
+    """Leave app.state as found, cancelling any tasks a test's startup created."""
+    state = server.app.state
+    ready = getattr(state, "ready", False)
+    yield state
+    for name in ("startup_task", "seed_task", "mentor_index_task"):
+        task = getattr(state, name, None)
+        if task is not None:
+            task.cancel()
+            delattr(state, name)
+    state.ready = ready
+
+
+@pytest.fixture
+def stub_startup(monkeypatch):
+    """Replace the warm-up steps so startup can be driven without Mongo; the pool warm-up fails until `reachable` is set."""
+    reachable = asyncio.Event()
+    attempts = []
+
+    async def warm_connection_pool():
+        attempts.append(1)
+        if not reachable.is_set():
+            raise ServerSelectionTimeoutError("localhost:27017: connection refused")
+
+    async def noop(*args):
+        pass
+
+    monkeypatch.setattr(server, "STARTUP_RETRY_SECONDS", 0)
+    monkeypatch.setattr(server, "warm_connection_pool", warm_connection_pool)
+    monkeypatch.setattr(server, "ensure_indexes", noop)
+    monkeypatch.setattr(server, "refresh_mentor_index", noop)
+    monkeypatch.setattr(server, "run_seed_in_background", noop)
+    monkeypatch.setattr(server, "refresh_mentor_index_periodically", noop)
+    monkeypatch.setattr(server.message_hub, "start", noop)
+    return reachable, attempts
+
+
+async def test_healthz_answers_while_not_ready(client, app_state):
+    app_state.ready = False
+
+    response = await client.get("/healthz")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+async def test_readyz_reports_starting_until_ready(client, app_state):
+    app_state.ready = False
+
+    response = await client.get("/readyz")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "starting"}
+
+
+async def test_readyz_reports_unreachable_mongo_once_started(client, app_state, monkeypatch):
+    async def ping(*args, **kwargs):
+        raise ServerSelectionTimeoutError("localhost:27017: connection refused")
+
+    monkeypatch.setattr(server.db, "command", ping)
+    app_state.ready = True
+
+    response = await client.get("/readyz")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "mongo": "unreachable"}
+
+
+async def test_readyz_ready_when_mongo_answers(client, app_state, monkeypatch):
+    async def ping(*args, **kwargs):
+        return {"ok": 1}
+
+    monkeypatch.setattr(server.db, "command", ping)
+    app_state.ready = True
+
+    response = await client.get("/readyz")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready"}
+
+
+async def test_startup_returns_at_once_and_retries_unreachable_mongo(client, app_state, stub_startup):
+    reachable, attempts = stub_startup
+
+    await server.start_application(server.app)
+    while len(attempts) < 3:
+        await asyncio.sleep(0)
+
+    assert not app_state.startup_task.done()
+    assert app_state.ready is False
+    assert (await client.get("/healthz")).status_code == 200
+    assert (await client.get("/readyz")).json() == {"status": "starting"}
+
+    reachable.set()
+    await asyncio.wait_for(app_state.startup_task, 1)
+
+    assert app_state.ready is True
@@ -0,0 +1,26 @@
+"""Every registered query shape must be served by an index on a real mongod.
+
+mongomock has no query planner, so this runs against MONGO_TEST_URL
+(default mongodb://localhost:27017) and is skipped when none is reachable.
+"""
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_no_query_shape_collscans(mongod_db):
+    await server.ensure_indexes()
+    assert await server.audit_query_plans() == []
+
+
+async def test_ensure_indexes_survives_legacy_duplicates(db, caplog):
+    await db.users.insert_many([
+        {"id": "a", "email": "same@example.com"},
+        {"id": "b", "email": "same@example.com"},
+    ])
+    await server.ensure_indexes()
+    assert "email" in caplog.text
+    # Every other collection still got its indexes
+    assert "conversation_id_1_created_at_-1_id_-1" in await db.messages.index_information()
@@ -0,0 +1,76 @@
+"""Mentor rating aggregates and the feedback routes."""
+from datetime import timedelta
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def feedback(feedback_id, rating, minutes_ago=0):
+    return {"id": feedback_id, "session_id": "s", "from_user_id": "s1", "to_user_id": "m1",
+            "rating": rating, "comment": None, "created_at": server.utc_now() - timedelta(minutes=minutes_ago)}
+
+
+async def add_users(db):
+    await db.users.insert_many([
+        {"id": "m1", "email": "m1@example.com", "name": "Mentor", "role": "mentor", "rating": 0.0},
+        {"id": "s1", "email": "s1@example.com", "name": "Student", "role": "student"},
+    ])
+
+
+@pytest.fixture
+async def client(db):
+    await add_users(db)
+    token = server.create_access_token({"sub": "s1"})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+async def test_reconcile_rebuilds_aggregates_from_feedback(db):
+    await add_users(db)
+    await db.feedback.insert_many([feedback("f1", 5), feedback("f2", 4), feedback("f3", 4)])
+
+    assert await server.reconcile_ratings() == 1
+    mentor = await db.users.find_one({"id": "m1"})
+    assert (mentor["rating_sum"], mentor["rating_count"], mentor["rating"]) == (13, 3, 4.3)
+    assert mentor["rating_histogram"] == {"1": 0, "2": 0, "3": 0, "4": 2, "5": 1}
+
+
+async def test_feedback_listing_stays_a_list_with_separate_summary(client, db):
+    await db.feedback.insert_many([feedback("f1", 5, minutes_ago=2), feedback("f2", 3, minutes_ago=1)])
+
+    listing = await client.get("/api/feedback/m1")
+    assert [(item["id"], item["from_user_name"]) for item in listing.json()] == [("f2", "Student"), ("f1", "Student")]
+
+    # Legacy mentor without aggregates: the summary seeds them from feedback
+    summary = (await client.get("/api/feedback/m1/summary")).json()
+    assert (summary["rating"], summary["rating_count"]) == (4.0, 2)
+    assert summary["rating_histogram"]["3"] == 1
+    assert (await client.get("/api/feedback/nobody/summary")).status_code == 404
+
+
+async def test_failed_rating_update_removes_the_feedback(client, db, monkeypatch):
+    async def broken(user_id, rating):
+        raise RuntimeError("rating update failed")
+
+    monkeypatch.setattr(server, "apply_rating", broken)
+    with pytest.raises(RuntimeError):
+        await client.post("/api/feedback", json={"session_id": "s", "to_user_id": "m1", "rating": 5})
+    assert await db.feedback.count_documents({}) == 0
+
+
+async def test_first_rating_keeps_earlier_votes(mongod_db):
+    # Pipeline updates ($round) need a real mongod
+    await add_users(mongod_db)
+    # f3 is the rating being applied; submit_feedback stores it first
+    await mongod_db.feedback.insert_many([feedback("f1", 2), feedback("f2", 2), feedback("f3", 5)])
+
+    rated = await server.apply_rating("m1", 5)
+    assert rated["rating"] == 3.0
+    rated = await server.apply_rating("m1", 1)  # incremental from here on
+    mentor = await mongod_db.users.find_one({"id": "m1"})
+    assert (mentor["rating_count"], mentor["rating_sum"], rated["rating"]) == (4, 10, 2.5)
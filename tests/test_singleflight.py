@@ -0,0 +1,31 @@
+"""Request coalescing for hot identical reads."""
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_singleflight_shares_in_flight_loads_only():
+    flight = server.SingleFlight({"coalesced"})
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    results = asyncio.gather(*(flight.do("coalesced", "key", load) for _ in range(3)))
+    await asyncio.sleep(0)
+    assert flight.stats() == {"in_flight": 1}
+    release.set()
+    assert await results == [1, 1, 1]
+    assert flight.stats() == {"in_flight": 0}
+
+    # Nothing is cached once the load finishes, and other routes never share
+    assert await flight.do("coalesced", "key", load) == 2
+    assert await asyncio.gather(flight.do("other", "key", load), flight.do("other", "key", load)) == [3, 4]
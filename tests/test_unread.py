@@ -0,0 +1,73 @@
+"""Unread counters and mark-as-read."""
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@asynccontextmanager
+async def api_as(user_id):
+    token = server.create_access_token({"sub": user_id})
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers={"Authorization": f"Bearer {token}"}) as client:
+        yield client
+
+
+@pytest.fixture
+async def users(db):
+    await db.users.insert_many([
+        {"id": user_id, "email": f"{user_id}@example.com", "name": user_id.upper(), "role": "student"}
+        for user_id in ("a", "b", "c")
+    ])
+
+
+async def unread(client):
+    return (await client.get("/api/messages/unread-count", params={"by_conversation": True})).json()
+
+
+async def send(client, to_user_id, content="hi"):
+    response = await client.post("/api/messages", json={"to_user_id": to_user_id, "content": content})
+    assert response.status_code == 200
+    # Distinct created_at values keep the read cursor's position unambiguous
+    await asyncio.sleep(0.005)
+
+
+async def test_read_marks_up_to_the_newest_rendered_message(users):
+    async with api_as("a") as a, api_as("b") as b, api_as("c") as c:
+        for _ in range(3):
+            await send(b, "a")
+        await send(c, "a")
+        await send(a, "b")  # the sender's own counters never move
+        assert await unread(a) == {"total": 4, "conversations": {"b": 3, "c": 1}}
+        assert await unread(b) == {"total": 1, "conversations": {"a": 1}}
+
+        thread = (await a.get("/api/messages/conversations/b")).json()
+        await send(b, "a", "arrived after rendering")
+        marked = await a.post("/api/messages/read", json={"user_id": "b", "up_to": thread["read_cursor"]})
+        assert marked.json() == {"marked": 3}
+        assert await unread(a) == {"total": 2, "conversations": {"b": 1, "c": 1}}
+
+        # Without up_to the whole conversation is read; repeating it changes nothing
+        for _ in range(2):
+            await a.post("/api/messages/read", json={"user_id": "b"})
+        assert await unread(a) == {"total": 1, "conversations": {"c": 1}}
+
+
+async def test_total_never_reported_below_zero(users, db):
+    async with api_as("a") as a, api_as("b") as b:
+        await send(b, "a")
+        # A counter that drifted low, e.g. rebuilt before the message was counted
+        await db.counters.update_one({"_id": server.unread_counter_id("a")}, {"$set": {"total": 0}})
+        assert (await a.post("/api/messages/read", json={"user_id": "b"})).json() == {"marked": 1}
+        assert (await unread(a))["total"] == 0
+
+
+async def test_bad_read_cursor_is_rejected(users):
+    async with api_as("a") as a:
+        response = await a.post("/api/messages/read", json={"user_id": "b", "up_to": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+"""In-process user cache."""
+import asyncio
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, user_id):
+        self.calls += 1
+        await self.release.wait()
+        return {"id": user_id, "load": self.calls}
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = server.UserCache(max_size=10, ttl_seconds=60)
+    loader = CountingLoader()
+    gets = asyncio.gather(*(cache.get("u1", loader) for _ in range(5)))
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert [doc["load"] for doc in await gets] == [1] * 5
+
+    assert (await cache.get("u1", loader))["load"] == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 5
+
+
+async def test_callers_get_their_own_copy():
+    cache = server.UserCache(max_size=10, ttl_seconds=60)
+    loader = CountingLoader()
+    loader.release.set()
+    (await cache.get("u1", loader))["name"] = "changed"
+    assert "name" not in await cache.get("u1", loader)
+
+
+async def test_invalidate_during_load_keeps_stale_doc_out():
+    cache = server.UserCache(max_size=10, ttl_seconds=60)
+    loader = CountingLoader()
+    pending = asyncio.ensure_future(cache.get("u1", loader))
+    await asyncio.sleep(0)
+    cache.invalidate("u1")
+    loader.release.set()
+    assert (await pending)["load"] == 1
+
+    assert (await cache.get("u1", loader))["load"] == 2
+
+
+async def test_least_recently_used_entry_is_evicted():
+    cache = server.UserCache(max_size=2, ttl_seconds=60)
+    loader = CountingLoader()
+    loader.release.set()
+    for user_id in ("u1", "u2", "u1", "u3"):
+        await cache.get(user_id, loader)
+    assert cache.stats()["evictions"] == 1
+
+    await cache.get("u1", loader)
+    await cache.get("u2", loader)
+    assert loader.calls == 4  # u1 stayed; u2 was evicted and reloaded
+
+
+async def test_expired_entries_reload():
+    cache = server.UserCache(max_size=10, ttl_seconds=0)
+    loader = CountingLoader()
+    loader.release.set()
+    await cache.get("u1", loader)
+    await cache.get("u1", loader)
+    assert loader.calls == 2
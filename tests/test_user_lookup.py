@@ -0,0 +1,41 @@
+"""Batch user lookup."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(db):
+    await db.users.insert_many([
+        {"id": "u1", "email": "u1@example.com", "name": "Ann", "role": "mentor", "password_hash": "secret",
+         "expertise": ["Python"]},
+        {"id": "u2", "email": "u2@example.com", "name": "Bo", "role": "student", "password_hash": "secret"},
+    ])
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_lookup_returns_found_users_and_missing_ids(client):
+    response = await client.get("/api/users", params={"ids": "u1,u2,ghost,u1", "fields": "name,expertise"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["missing"] == ["ghost"]
+    assert body["users"]["u1"] == {"id": "u1", "name": "Ann", "expertise": ["Python"]}
+    # Fields the document lacks get the profile defaults
+    assert body["users"]["u2"] == {"id": "u2", "name": "Bo", "expertise": []}
+
+
+async def test_full_profiles_never_include_password_hashes(client):
+    body = (await client.post("/api/users/lookup", json={"ids": ["u1"]})).json()
+    assert set(body["users"]["u1"]) == set(server.UserResponse.model_fields)
+    assert (await client.get("/api/users", params={"ids": "u1", "fields": "password_hash"})).status_code == 400
+
+
+async def test_lookup_size_is_capped(client, monkeypatch):
+    monkeypatch.setattr(server, "USER_LOOKUP_MAX_IDS", 2)
+    response = await client.post("/api/users/lookup", json={"ids": ["a", "b", "c"]})
+    assert response.status_code == 400
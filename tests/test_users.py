@@ -0,0 +1,31 @@
+"""Conditional GETs of user profiles."""
+import httpx
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(db):
+    # Legacy users predate the version field
+    await db.users.insert_many([
+        {"id": user_id, "email": f"{user_id}@example.com", "name": user_id, "role": "student"}
+        for user_id in ("u1", "u2")
+    ])
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_etag_is_not_shared_between_users(client):
+    first = await client.get("/api/users/u1")
+    assert first.status_code == 200
+
+    other = await client.get("/api/users/u2", headers={"If-None-Match": first.headers["ETag"]})
+    assert other.status_code == 200
+    assert other.json()["id"] == "u2"
+
+    again = await client.get("/api/users/u1", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
@@ -0,0 +1,63 @@
+"""Group-committed inserts (WRITE_BATCHING_ENABLED)."""
+import asyncio
+
+import anyio
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+def message(message_id):
+    return {"id": message_id, "content": message_id}
+
+
+async def stored_ids(db):
+    return sorted([doc["id"] async for doc in db.messages.find()])
+
+
+async def test_flushes_when_batch_is_full(db):
+    batcher = server.WriteBatcher("messages", max_size=3, max_delay=60)
+    # Far sooner than max_delay: only the size trigger can release these
+    with anyio.fail_after(2):
+        await asyncio.gather(*(batcher.insert(message(f"m{i}")) for i in range(3)))
+    assert await stored_ids(db) == ["m0", "m1", "m2"]
+    assert batcher.stats()["pending"] == 0
+
+
+async def test_flushes_after_max_delay(db):
+    batcher = server.WriteBatcher("messages", max_size=100, max_delay=0.01)
+    with anyio.fail_after(2):
+        await batcher.insert(message("m0"))
+    assert await stored_ids(db) == ["m0"]
+
+
+async def test_partial_failure_reaches_only_its_caller(db):
+    await db.messages.create_index("id", unique=True)
+    await db.messages.insert_one(message("taken"))
+    batcher = server.WriteBatcher("messages", max_size=3, max_delay=60)
+
+    results = await asyncio.gather(
+        batcher.insert(message("a")),
+        batcher.insert(message("taken")),
+        batcher.insert(message("b")),
+        return_exceptions=True,
+    )
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], server.DuplicateKeyError)
+    assert await stored_ids(db) == ["a", "b", "taken"]
+
+
+async def test_close_flushes_queue_then_inserts_directly(db):
+    batcher = server.WriteBatcher("messages", max_size=100, max_delay=60)
+    queued = asyncio.ensure_future(batcher.insert(message("queued")))
+    await asyncio.sleep(0)
+    assert batcher.stats()["pending"] == 1
+
+    with anyio.fail_after(2):
+        await batcher.close()
+        await queued
+        await batcher.insert(message("late"))
+    assert batcher.stats() == {"pending": 0, "flushing": 0}
+    assert await stored_ids(db) == ["late", "queued"]